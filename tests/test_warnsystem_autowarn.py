@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("laggron_utils")
+
+from warnsystem.api import API  # noqa: E402
+from warnsystem.store import CaseStore  # noqa: E402
+
+
+@pytest.fixture
+def paris_tz(monkeypatch):
+    # a host with a non-UTC local time, the case times are in UTC
+    monkeypatch.setenv("TZ", "Europe/Paris")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+class Cache:
+    def __init__(self, autowarns):
+        self.autowarns = autowarns
+
+    def is_automod_enabled(self, guild):
+        return True
+
+    async def get_automod_warnings(self, guild):
+        return self.autowarns
+
+    def get_case_counts(self, guild, member):
+        return {1: 2}
+
+
+def test_autowarn_time_window_uses_utc(paris_tz):
+    guild = SimpleNamespace(id=1, me=SimpleNamespace(id=0))
+    member = SimpleNamespace(id=2)
+    store = CaseStore(Path(":memory:"))
+    # minimal instance, the pools of the regex aren't needed
+    api = API.__new__(API)
+    for _i in range(2):
+        # as created by API.warn
+        store.append(guild.id, member.id, api._make_case("mod", 1, datetime.utcnow()))
+
+    async def is_automod_immune(member):
+        return False
+
+    warns = []
+
+    async def warn(guild, **kwargs):
+        warns.append(kwargs)
+
+    api.bot = SimpleNamespace(is_automod_immune=is_automod_immune)
+    api.store = store
+    api.cache = Cache(
+        [
+            {
+                "automod_only": False,
+                "level": 0,
+                "number": 2,
+                "time": 600,  # 10 minutes, less than the offset of the timezone
+                "warn": {"level": 1, "reason": "autowarn", "duration": None},
+            }
+        ]
+    )
+    api.warn = warn
+    asyncio.run(api._automod_autowarn_member(guild, member, [(False, 1)]))
+    assert len(warns) == 1
@@ -0,0 +1,75 @@
+import asyncio
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("laggron_utils")
+
+from warnsystem.api import API  # noqa: E402
+from warnsystem.cache import MemoryCache  # noqa: E402
+
+
+class Group:
+    def __init__(self, data: dict):
+        self.data = data
+
+    async def all(self):
+        return dict(self.data)
+
+    async def set_raw(self, key, value):
+        self.data[str(key)] = value
+
+
+class Config:
+    def __init__(self):
+        self.temporary_warns = {}
+
+    def guild(self, guild):
+        warns = self.temporary_warns.setdefault(guild.id, {})
+        return SimpleNamespace(temporary_warns=Group(warns))
+
+
+def make_action(time: int):
+    return {"level": 2, "author": 0, "reason": None, "time": time, "duration": 60, "roles": []}
+
+
+def test_add_after_unload_keeps_stored_actions():
+    async def run():
+        guild = SimpleNamespace(id=1)
+        config = Config()
+        cache = MemoryCache(None, config, None)
+        now = int(datetime.utcnow().timestamp())
+        await cache.add_temp_action(guild, SimpleNamespace(id=2), make_action(now - 120))
+        # the guild was unavailable when its actions ended, see API._check_endwarn
+        cache.temp_actions.pop(guild.id)
+        await cache.add_temp_action(guild, SimpleNamespace(id=3), make_action(now - 120))
+        return {x[1] for x in cache.get_expired_temp_actions()}
+
+    assert asyncio.run(run()) == {2, 3}
+
+
+def test_unavailable_guild_keeps_its_actions():
+    async def run():
+        guild = SimpleNamespace(id=1)
+        cache = MemoryCache(None, Config(), None)
+        now = int(datetime.utcnow().timestamp())
+        await cache.add_temp_action(guild, SimpleNamespace(id=2), make_action(now - 120))
+        api = API.__new__(API)
+        api.bot = SimpleNamespace(get_guild=lambda x: None)  # outage
+        api.cache = cache
+        await api._check_endwarn()
+        assert 2 in cache.temp_actions[guild.id]
+        # postponed, the loop must sleep instead of trying again right away
+        assert cache.get_expired_temp_actions() == []
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.wait_for_temp_actions(), timeout=0.1)
+        # once the delay is over, the action is expired again
+        cache.temp_actions_heap = [
+            (end - API.TEMP_ACTIONS_RETRY_DELAY, *key) for end, *key in cache.temp_actions_heap
+        ]
+        return {x[1] for x in cache.get_expired_temp_actions()}
+
+    assert asyncio.run(run()) == {2}
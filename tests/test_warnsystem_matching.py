@@ -0,0 +1,109 @@
+import random
+import re
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("laggron_utils")
+
+from warnsystem.matching import RegexIndex, RegexMatcher, required_literals  # noqa: E402
+
+PATTERNS = [
+    r"badword",
+    r"(?i)badword",
+    r"(?i)spam|scam|free nitro",
+    r"free (nitro|robux)",
+    r"(?i)disc(o|0)rd\.gift",
+    r"abcx{0}def",
+    r"(?:abc)?def",
+    r"(?x) b a d \s* word  # comment",
+    r"(?i)kelvin",  # the Kelvin sign folds to k
+    r"(?i)session",  # the long s folds to s
+    r"(?i)istanbul",  # the dotted capital I only matches with ignore case
+    r"straße",
+    r"(?i)STRASSE",
+    r"^hello$",
+    r"(?m)^hello$",
+    r"(?P<word>abc)(?P=word)",
+    r"\bwww\.[a-z]+\.com\b",
+    r"a{3,}",
+]
+
+TEXTS = [
+    "",
+    "this has a badword in it",
+    "BADWORD",
+    "Free Nitro here",
+    "free robux",
+    "discord.gift/abc",
+    "DISC0RD.GIFT",
+    "abcdef",
+    "abdef",
+    "def",
+    "bad   word",
+    "badword",
+    "KELVIN",
+    "ſession",
+    "İstanbul",
+    "straße",
+    "STRASSE",
+    "strasse",
+    "hello",
+    "line\nhello\nline",
+    "abcabc",
+    "visit www.example.com now",
+    "aaaa",
+]
+
+ALPHABET = "abcdefghiklnorstuwxyz .\n0KſİßABDEIKS"
+
+
+def fuzz_texts(count: int):
+    rng = random.Random(0)
+    words = ["bad", "word", "spam", "nitro", "free", "abc", "def", "kelvin", "www.", ".com"]
+    for _i in range(count):
+        parts = []
+        for _j in range(rng.randint(0, 6)):
+            if rng.random() < 0.5:
+                word = rng.choice(words)
+                parts.append(word.upper() if rng.random() < 0.3 else word)
+            else:
+                parts.append("".join(rng.choice(ALPHABET) for _k in range(rng.randint(1, 4))))
+        yield "".join(parts)
+
+
+@pytest.fixture(scope="module")
+def patterns():
+    return {f"p{i}": re.compile(x) for i, x in enumerate(PATTERNS)}
+
+
+def check(patterns: dict, index: RegexIndex, text: str):
+    expected = [name for name, pattern in patterns.items() if pattern.search(text)]
+    candidates = index.get_candidates(text)
+    # the prefilter may keep too many patterns, but never drop one that matches
+    assert set(expected) <= candidates, text
+    assert RegexMatcher(patterns).find(text) == expected, text
+    matcher = index.get_matcher(candidates)
+    assert (matcher.find(text) if matcher is not None else []) == expected, text
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_prefilter_and_matcher_agree_with_re(patterns, text):
+    check(patterns, RegexIndex(patterns, ("test",)), text)
+
+
+def test_prefilter_and_matcher_fuzz(patterns):
+    index = RegexIndex(patterns, ("test",))
+    for text in fuzz_texts(2000):
+        check(patterns, index, text)
+
+
+def test_required_literals():
+    assert required_literals(re.compile("(?i)BadWord")) == {"badword"}
+    # "i" is never part of a literal, it also matches the dotted capital I
+    assert required_literals(re.compile("spam|nitro")) == {"spam", "tro"}
+    # x{0} matches nothing, the literals around it aren't joined
+    assert required_literals(re.compile("abcx{0}def")) == {"abc"}
+    # no literal every match must contain
+    assert required_literals(re.compile("(?:abc)?d")) is None
+    assert required_literals(re.compile("a|bcd")) is None
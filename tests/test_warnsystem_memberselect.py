@@ -0,0 +1,184 @@
+import asyncio
+import random
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("laggron_utils")
+
+from warnsystem.converters import AdvancedMemberSelect  # noqa: E402
+from warnsystem.memberindex import MemberIndex  # noqa: E402
+
+BASE_ID = 100000000000000000
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+class Role:
+    def __init__(self, position: int):
+        self.id = BASE_ID + position
+        self.position = position
+        self.name = f"role{position}"
+
+    def is_default(self):
+        return self.position == 0
+
+    def __repr__(self):
+        return self.name
+
+
+class Member:
+    def __init__(self, member_id: int, roles: list, joined_at, bot: bool = False):
+        self.id = member_id
+        self.roles = roles  # with @everyone first, like discord.py
+        self._roles = [x.id for x in roles if not x.is_default()]
+        self.joined_at = joined_at
+        self.bot = bot
+
+    @property
+    def top_role(self):
+        return max(self.roles, key=lambda x: x.position)
+
+    def __repr__(self):
+        return f"Member({self.id})"
+
+
+class Guild:
+    def __init__(self, roles: list, members: list):
+        self.roles = roles
+        self.members = members
+        self._roles = {x.id: x for x in roles}
+
+    def get_role(self, role_id: int):
+        return self._roles.get(role_id)
+
+
+def make_guild(seed: int = 0, size: int = 60) -> Guild:
+    rng = random.Random(seed)
+    roles = [Role(x) for x in range(6)]  # roles[0] is @everyone
+    members = []
+    for i in range(size):
+        member_roles = [roles[0]] + sorted(
+            rng.sample(roles[1:], rng.randint(0, 3)), key=lambda x: x.position
+        )
+        # some members have no join date (lurkers)
+        joined_at = (
+            None if rng.random() < 0.2 else START + timedelta(days=rng.randint(0, 30), seconds=i)
+        )
+        members.append(Member(i, member_roles, joined_at, bot=rng.random() < 0.3))
+    return Guild(roles, members)
+
+
+def select(guild: Guild, *arguments: str):
+    selector = AdvancedMemberSelect()
+    selector.ctx = SimpleNamespace(guild=guild)
+    args = selector.parse_arguments(("--take-action",) + arguments)
+    members, _unavailable = asyncio.run(selector.process_arguments(args))
+    return members, selector
+
+
+# per-member filters, as they were before the member index
+
+
+def old_above(members, role):
+    return [x for x in members if x.top_role.position > role.position]
+
+
+def old_below(members, role):
+    return [x for x in members if x.top_role.position < role.position]
+
+
+def joined(members):
+    return [x for x in members if x.joined_at is not None]
+
+
+def old_last_njoins(members, number):
+    return sorted(joined(members), key=lambda x: x.joined_at, reverse=True)[:number]
+
+
+def old_first_njoins(members, number):
+    return sorted(joined(members), key=lambda x: x.joined_at)[:number]
+
+
+def ids(members):
+    return sorted(x.id for x in members)
+
+
+@pytest.mark.parametrize("position", range(6))
+def test_above_below_boundary(position):
+    guild = make_guild()
+    role = guild.roles[position]
+    index = MemberIndex(guild)
+    assert ids(index.select(index.above(role))) == ids(old_above(guild.members, role))
+    assert ids(index.select(index.below(role))) == ids(old_below(guild.members, role))
+    # a member whose top role is the given role is neither above nor below
+    at_role = [x for x in guild.members if x.top_role is role]
+    selected = ids(index.select(index.above(role) | index.below(role)))
+    assert at_role and not set(ids(at_role)) & set(selected)
+
+
+def test_above_below_arguments():
+    guild = make_guild(1)
+    role = guild.roles[3]
+    members, _selector = select(guild, "--above", str(role.id))
+    assert ids(members) == ids(old_above(guild.members, role))
+    members, _selector = select(guild, "--below", str(role.id))
+    assert ids(members) == ids(old_below(guild.members, role))
+
+
+def test_members_without_join_date():
+    guild = make_guild(2)
+    lurkers = {x.id for x in guild.members if x.joined_at is None}
+    assert lurkers
+    middle = START + timedelta(days=15)
+    members, _selector = select(guild, "--joined-before", "2020-01-16")
+    assert ids(members) == ids(x for x in joined(guild.members) if x.joined_at < middle)
+    members, _selector = select(guild, "--joined-after", "2020-01-16")
+    assert ids(members) == ids(x for x in joined(guild.members) if x.joined_at > middle)
+    members, _selector = select(guild, "--last-njoins", "5")
+    assert ids(members) == ids(old_last_njoins(guild.members, 5))
+    members, _selector = select(guild, "--first-njoins", "5")
+    assert ids(members) == ids(old_first_njoins(guild.members, 5))
+    # more than the number of members with a join date
+    members, _selector = select(guild, "--last-njoins", "1000")
+    assert ids(members) == ids(joined(guild.members))
+
+
+def test_njoins_barrier_keeps_its_place():
+    guild = make_guild(3)
+    role = guild.roles[2]
+    # the filters before --last-njoins apply first, the role filter applies after it
+    members, _selector = select(
+        guild, "--only-humans", "--last-njoins", "10", "--has-role", str(role.id)
+    )
+    humans = [x for x in guild.members if not x.bot]
+    expected = [x for x in old_last_njoins(humans, 10) if role in x.roles]
+    assert ids(members) == ids(expected)
+    # the cheap role filter moved before the barrier would give another result
+    moved = old_last_njoins([x for x in humans if role in x.roles], 10)
+    assert ids(moved) != ids(expected)
+
+
+def test_explain():
+    guild = make_guild(4)
+    role = guild.roles[2]
+    members, selector = select(
+        guild, "--explain", "--only-humans", "--first-njoins", "10", "--has-role", str(role.id)
+    )
+    assert members == []
+    lines = selector.explain.splitlines()
+    assert f"{len(guild.members)} members" in lines[0]
+    rows = [
+        x.split()
+        for x in lines
+        if x.split() and x.split()[0] in ("only-humans", "first-njoins", "has-role")
+    ]
+    assert [x[0] for x in rows] == ["only-humans", "first-njoins", "has-role"]
+    humans = [x for x in guild.members if not x.bot]
+    first = old_first_njoins(humans, 10)
+    # filter, members checked, members kept
+    assert rows[0][1:3] == [str(len(guild.members)), str(len(humans))]
+    assert rows[1][1:3] == [str(len(humans)), str(len(first))]
+    assert rows[2][1:3] == [str(len(first)), str(len([x for x in first if role in x.roles]))]
@@ -0,0 +1,146 @@
+import asyncio
+
+from copy import deepcopy
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("laggron_utils")
+
+import warnsystem  # noqa: E402
+from warnsystem.store import CaseStore  # noqa: E402
+
+
+def make_case(reason: str, level: int = 1, time: int = 1600000000) -> dict:
+    return {
+        "level": level,
+        "author": 0,
+        "reason": reason,
+        "time": time,
+        "duration": None,
+        "roles": [],
+    }
+
+
+@pytest.fixture
+def store():
+    store = CaseStore(Path(":memory:"))
+    yield store
+    store.close()
+
+
+def case_numbers(store: CaseStore, guild_id: int, member_id: int) -> list:
+    cursor = store.conn.execute(
+        "SELECT case_no FROM cases WHERE guild_id = ? AND member_id = ? ORDER BY case_no",
+        (guild_id, member_id),
+    )
+    return [x[0] for x in cursor]
+
+
+@pytest.mark.parametrize("index", [1, 3, 5])
+def test_delete_renumbers(store, index):
+    for i in range(1, 6):
+        store.append(1, 2, make_case(str(i), time=1600000000 + i))
+    store.append(1, 3, make_case("other member"))
+    store.append(4, 2, make_case("other guild"))
+    deleted = store.delete(1, 2, index)
+    assert deleted["reason"] == str(index)
+    assert case_numbers(store, 1, 2) == [1, 2, 3, 4]
+    expected = [str(x) for x in range(1, 6) if x != index]
+    assert [x["reason"] for x in store.get_all(1, 2)] == expected
+    assert [store.get(1, 2, i)["reason"] for i in range(1, 5)] == expected
+    assert store.get(1, 2, 5) is None
+    # the other modlogs are untouched
+    assert case_numbers(store, 1, 3) == [1]
+    assert case_numbers(store, 4, 2) == [1]
+    # the indexes follow the renumbered rows
+    assert store.conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    indexes = {x[1] for x in store.conn.execute("PRAGMA index_list(cases)")}
+    assert {"cases_guild_time", "cases_member"} <= indexes
+    assert [x[1]["reason"] for x in store.get_guild(1) if x[0] == 2] == expected
+    assert store.user_guilds(2) == [1, 4]
+    # the next case takes the number after the last one
+    assert store.append(1, 2, make_case("new")) == 5
+
+
+def test_delete_missing_case(store):
+    store.append(1, 2, make_case("1"))
+    assert store.delete(1, 2, 2) is None
+    assert store.delete(1, 3, 1) is None
+    assert case_numbers(store, 1, 2) == [1]
+
+
+V1_MODLOGS = {
+    "1": {
+        "2": {"x": [make_case("first", 1, 10), make_case("second", 3, 20)]},
+        "3": {"x": [make_case("third", 5, 15)]},
+        "4": {"x": []},
+    },
+    "5": {"2": {"x": [dict(make_case("muted", 2, 30), duration=3600, roles=[6, 7])]}},
+    # not guild or member IDs, ignored
+    "GUILD": {"2": {"x": [make_case("ignored")]}},
+    "8": {"MEMBER": {"x": [make_case("ignored")]}},
+}
+
+
+def test_import_modlogs(store):
+    store.append(9, 9, make_case("replaced"))
+    assert store.import_modlogs(deepcopy(V1_MODLOGS)) == 4
+    assert store.get_all(9, 9) == []
+    assert store.get_all(1, 2) == V1_MODLOGS["1"]["2"]["x"]
+    assert store.get_all(1, 3) == V1_MODLOGS["1"]["3"]["x"]
+    assert store.get_all(5, 2) == V1_MODLOGS["5"]["2"]["x"]
+    assert store.count(1, 2) == {1: 1, 3: 1}
+    assert store.count_guild(1) == 3
+    assert store.count_guild(8) == 0
+    assert [x[1]["reason"] for x in store.get_guild(1)] == ["first", "third", "second"]
+
+
+class Value:
+    def __init__(self, value):
+        self.value = value
+
+    async def __call__(self):
+        return self.value
+
+    async def set(self, value):
+        self.value = value
+
+
+class Modlogs:
+    def __init__(self, data: dict):
+        self.data = data
+
+    async def all(self):
+        return deepcopy(self.data)
+
+    async def clear(self):
+        self.data = {}
+
+
+class Config:
+    def __init__(self, modlogs: dict):
+        self.data_version = Value("1.0")
+        self.modlogs = Modlogs(modlogs)
+
+    def custom(self, group: str):
+        assert group == "MODLOGS"
+        return self.modlogs
+
+
+def test_update_config_moves_modlogs(store, monkeypatch):
+    backups = []
+
+    async def save_backup(config):
+        backups.append(await config.custom("MODLOGS").all())
+
+    monkeypatch.setattr(warnsystem, "_save_backup", save_backup)
+    config = Config(deepcopy(V1_MODLOGS))
+    asyncio.run(warnsystem.update_config(None, config, store))
+    # the backup is done before anything is removed
+    assert backups == [V1_MODLOGS]
+    assert config.data_version.value == "2.0"
+    assert config.modlogs.data == {}
+    assert store.get_all(1, 2) == V1_MODLOGS["1"]["2"]["x"]
+    assert store.get_user(2) == {1: V1_MODLOGS["1"]["2"]["x"], 5: V1_MODLOGS["5"]["2"]["x"]}
@@ -157,31 +157,58 @@ async def _convert_to_v1(bot, config):
             await config.custom("MODLOGS", guild.id).set(modlogs)
 
 
-async def update_config(bot, config):
+async def _convert_to_v2(config, store):
+    modlogs = await config.custom("MODLOGS").all()
+    total = store.import_modlogs(modlogs)
+    log.info(f"{total} cases were moved to the new modlog storage.")
+
+
+async def update_config(bot, config, store):
     """
     Warnsystem 1.3.0 requires an update with the config body.
     Temporary warns are stored as a dict instead of a list.
+
+    Warnsystem 1.5.0 moves the modlogs from Config to a dedicated storage.
     """
     if await config.data_version() == "0.0":
         all_guilds = await config.all_guilds()
         if not any("temporary_warns" in x for x in all_guilds.values()):
             await config.data_version.set("1.0")
+        else:
+            log.info(
+                "WarnSystem 1.3.0 changed the way data is stored. Your data will be updated. "
+                "A copy will be created. If something goes wrong and the data is not usable, keep "
+                "that file safe and ask support on how to recover the data."
+            )
+            # perform a backup, any exception MUST be raised
+            await _save_backup(config)
+            # we consider we have a safe backup at this point
+            await _convert_to_v1(bot, config)
+            await config.data_version.set("1.0")
+            log.info(
+                "All data successfully converted! The cog will now load. Keep the backup file for "
+                "a bit since problems can occur after cog load."
+            )
+            # phew
+    if await config.data_version() == "1.0":
+        if not await config.custom("MODLOGS").all():
+            await config.data_version.set("2.0")
             return
         log.info(
-            "WarnSystem 1.3.0 changed the way data is stored. Your data will be updated. "
+            "WarnSystem 1.5.0 moves the modlogs to a new storage. Your data will be moved. "
             "A copy will be created. If something goes wrong and the data is not usable, keep "
             "that file safe and ask support on how to recover the data."
         )
-        # perform a backup, any exception MUST be raised
         await _save_backup(config)
-        # we consider we have a safe backup at this point
-        await _convert_to_v1(bot, config)
-        await config.data_version.set("1.0")
+        # the import replaces the whole storage, this can safely run again if interrupted
+        await _convert_to_v2(config, store)
+        await config.data_version.set("2.0")
+        # the data now lives in the new storage, no need to keep two copies
+        await config.custom("MODLOGS").clear()
         log.info(
-            "All data successfully converted! The cog will now load. Keep the backup file for "
+            "All modlogs successfully moved! The cog will now load. Keep the backup file for "
             "a bit since problems can occur after cog load."
         )
-        # phew
 
 
 async def setup(bot):
@@ -190,12 +217,13 @@ async def setup(bot):
     # the cog conflicts with the core Warnings cog, we must check that
     if "Warnings" in bot.cogs:
         close_logger(log)  # still need some cleaning up
+        n.store.close()
         raise CogLoadError(
             "You need to unload the Warnings cog to load "
             "this cog. Type `[p]unload warnings` and try again."
         )
     try:
-        await update_config(bot, n.data)
+        await update_config(bot, n.data, n.store)
     except Exception as e:
         log.critical(
             "Cannot update config. Data can be corrupted, do not try to load the cog."
@@ -203,6 +231,7 @@ async def setup(bot):
             exc_info=e,
         )
         close_logger(log)  # still need some cleaning up
+        n.store.close()
         raise CogLoadError(
             "After an update, the cog tried to perform changes to the saved data but an error "
             "occured. Read your console output or warnsystem.log (located over "
@@ -213,6 +242,7 @@ async def setup(bot):
         ) from e
     await bot.add_cog(n)
     await n.cache.init_automod_enabled()
+    await n.cache.init_temp_actions()
     n.task = bot.loop.create_task(n.api._loop_task())
     if n.cache.automod_enabled:
         n.api.enable_automod()
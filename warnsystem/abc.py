@@ -6,6 +6,7 @@ if TYPE_CHECKING:
     from redbot.core.bot import Red
     from .cache import MemoryCache
     from .api import API
+    from .store import CaseStore
 
 
 class MixinMeta(ABC):
@@ -22,3 +23,4 @@ class MixinMeta(ABC):
         self.data: Config
         self.cache: MemoryCache
         self.api: API
+        self.store: CaseStore
@@ -0,0 +1,108 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class SpamWindow:
+    """
+    Timestamps of the recent messages of a member in a channel.
+
+    Only the last ``max_messages + 1`` timestamps are needed to know if the threshold is
+    exceeded, they're kept in a fixed-size ring buffer, so a message costs no allocation.
+    """
+
+    __slots__ = ("times", "start", "size", "warned", "expires")
+
+    def __init__(self, max_messages: int):
+        self.times = array("d", bytes(8 * (max_messages + 1)))
+        self.start = 0
+        self.size = 0
+        self.warned: Optional[float] = None  # time of the last text warn
+        self.expires = 0.0  # past this time, the window has no effect anymore
+
+    @property
+    def capacity(self) -> int:
+        return len(self.times)
+
+    def add(self, timestamp: float, delay: float) -> int:
+        """
+        Add a message and return the number of messages within the delay (up to the capacity).
+        """
+        times = self.times
+        capacity = len(times)
+        # messages are mostly received in order, the oldest ones are at the start
+        while self.size and timestamp - times[self.start] > delay:
+            self.start = (self.start + 1) % capacity
+            self.size -= 1
+        if self.size == capacity:
+            # threshold already exceeded, the oldest message isn't needed anymore
+            self.start = (self.start + 1) % capacity
+            self.size -= 1
+        times[(self.start + self.size) % capacity] = timestamp
+        self.size += 1
+        return self.size
+
+    def reset(self, warned: float):
+        self.start = 0
+        self.size = 0
+        self.warned = warned
+
+
+class AntispamTracker:
+    """
+    Spam windows of the members, keyed by guild ID, channel ID and member ID.
+
+    The windows are kept in the order of their last message. Once both delays of its guild are
+    over, a window has no effect anymore: the idle ones are dropped from the front as messages
+    come, and the oldest ones are dropped if there are more than ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.windows: Dict[Tuple[int, int, int], SpamWindow] = OrderedDict()
+        self.guild_counts: Dict[int, int] = {}
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.windows)
+
+    def get(
+        self,
+        guild_id: int,
+        channel_id: int,
+        member_id: int,
+        max_messages: int,
+        timestamp: float,
+        lifetime: float,
+    ) -> SpamWindow:
+        """
+        Return the window of a member in a channel, after a message sent at the given time.
+        """
+        self.evict(timestamp)
+        key = (guild_id, channel_id, member_id)
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = SpamWindow(max_messages)
+            self.guild_counts[guild_id] = self.guild_counts.get(guild_id, 0) + 1
+        elif window.capacity != max_messages + 1:
+            # the threshold was edited
+            window = self.windows[key] = SpamWindow(max_messages)
+            self.windows.move_to_end(key)
+        else:
+            self.windows.move_to_end(key)
+        window.expires = timestamp + lifetime
+        return window
+
+    def evict(self, now: float):
+        windows = self.windows
+        while windows:
+            key, window = next(iter(windows.items()))
+            if window.expires >= now and len(windows) < self.max_entries:
+                break
+            del windows[key]
+            self.evicted += 1
+            count = self.guild_counts[key[0]] - 1
+            if count:
+                self.guild_counts[key[0]] = count
+            else:
+                del self.guild_counts[key[0]]
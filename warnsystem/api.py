@@ -5,11 +5,11 @@ import re
 import functools
 
 from copy import deepcopy
-from collections import namedtuple
-from typing import Union, Optional, Iterable, Callable, Awaitable
+from collections import OrderedDict, namedtuple
+from typing import Union, Optional, Iterable, Callable, Awaitable, List
 from datetime import datetime, timedelta
-from multiprocessing import TimeoutError
 from multiprocessing.pool import Pool
+from time import monotonic
 
 from redbot.core import Config
 from redbot.core.bot import Red
@@ -21,7 +21,11 @@ try:
 except RuntimeError:
     pass  # running sphinx-build raises an error when importing this module
 
+from .antispam import AntispamTracker
 from .cache import MemoryCache
+from .matching import RegexDispatcher, RegexMatcher, SearchResult, lower_priority
+from .metrics import LatencyHistogram
+from .store import CaseStore
 from . import errors
 
 log = logging.getLogger("red.laggron.warnsystem")
@@ -29,6 +33,35 @@ _ = Translator("WarnSystem", __file__)
 id_pattern = re.compile(r"([0-9]{15,21})$")
 
 
+# maximum number of users for a single bulk ban request
+BULK_BAN_LIMIT = 200
+BulkBanResult = namedtuple("BulkBanResult", ("banned", "failed"))
+
+
+async def bulk_ban_fallback(
+    guild: discord.Guild,
+    users: list,
+    *,
+    reason: Optional[str] = None,
+    delete_message_seconds: int = 86400,
+) -> BulkBanResult:
+    """
+    Stand-in for :meth:`discord.Guild.bulk_ban` when it's not available, bans the users one
+    by one and returns a result of the same shape.
+    """
+    banned, failed = [], []
+    for user in users:
+        try:
+            await guild.ban(
+                user, reason=reason, delete_message_days=delete_message_seconds // 86400
+            )
+        except discord.errors.HTTPException:
+            failed.append(discord.Object(user.id))
+        else:
+            banned.append(discord.Object(user.id))
+    return BulkBanResult(banned, failed)
+
+
 class SafeMember:
     def __init__(self, member: discord.Member) -> None:
         self.name = str(member.name)
@@ -169,17 +202,63 @@ class API:
             version = bot.get_cog('WarnSystem').__version__
     """
 
-    def __init__(self, bot: Red, config: Config, cache: MemoryCache):
+    # number of members warned at the same time by a single call to warn
+    MASSWARN_WORKERS = 10
+    # maximum number of simultaneous requests for each kind of action
+    MASSWARN_DM_CONCURRENCY = 5
+    MASSWARN_ACTION_CONCURRENCY = 5
+    MASSWARN_MODLOG_CONCURRENCY = 2
+    # number of cases kept in memory before saving them
+    MASSWARN_CHECKPOINT = 100
+    # seconds before retrying the end of the temporary actions of an unavailable guild
+    TEMP_ACTIONS_RETRY_DELAY = 60
+    # seconds during which the automod immunity of a member is trusted without checking again
+    AUTOMOD_ELIGIBILITY_TTL = 60
+    # seconds to wait for other warns before looking for autowarns, they're checked together
+    AUTOWARN_DELAY = 1
+    # maximum number of members whose modlog is checked for autowarns at the same time
+    AUTOWARN_CONCURRENCY = 5
+
+    def __init__(self, bot: Red, config: Config, cache: MemoryCache, store: CaseStore):
         self.bot = bot
         self.data = config
         self.cache = cache
-        self.re_pool = Pool(maxtasksperchild=1000)
+        self.store = store
         self.regex_timeout = 1
-        self.warned_guilds = []  # see automod_check_for_autowarn
-        self.antispam = {}  # see automod_process_antispam
+        self.re_dispatcher = RegexDispatcher(
+            functools.partial(Pool, maxtasksperchild=1000), self.regex_timeout
+        )
+        # patterns consistently slow are searched apart, so they don't delay the others
+        # a single process, replaced if it stops answering so the next searches aren't stuck
+        self.re_slow_dispatcher = RegexDispatcher(
+            functools.partial(Pool, 1, initializer=lower_priority, maxtasksperchild=1000),
+            self.regex_timeout,
+            recycle=True,
+        )
+        self.regex_slow_threshold = 0.05
+        self.regex_stats = {}  # see _record_regex_timings
+        self.slow_regex = {}  # guild ID > set of regex names
+        self.warned_guilds = set()  # see automod_check_for_autowarn
+        # (guild_id, member_id) > (member, list of (warned by the bot, level)) of the warns
+        # waiting for an autowarn check
+        self.autowarn_queue = {}
+        self.autowarn_running = set()  # (guild_id, member_id) currently checked
+        self.autowarn_limit = asyncio.Semaphore(self.AUTOWARN_CONCURRENCY)
+        self.autowarn_stats = {}  # guild_id > LatencyHistogram of the autowarn checks
+        self.antispam = AntispamTracker()  # see automod_process_antispam
+        # (guild_id, member_id) > (expiration, eligible), see _check_if_automod_valid
+        self.automod_eligibility = OrderedDict()
         self.antispam_warn_queue = {}  # see automod_warn
         self.automod_warn_task: asyncio.Task
 
+    @property
+    def re_pool(self) -> Pool:
+        return self.re_dispatcher.pool
+
+    @property
+    def re_slow_pool(self) -> Pool:
+        return self.re_slow_dispatcher.pool
+
     def _get_datetime(self, time: int) -> datetime:
         return datetime.fromtimestamp(int(time))
 
@@ -227,6 +306,39 @@ class API:
             string = strings[0]
         return string
 
+    async def _bulk_ban(
+        self,
+        guild: discord.Guild,
+        members: list,
+        audit_reason: str,
+        delete_message_days: int,
+    ) -> set:
+        """
+        Ban multiple members with as few requests as possible, returns the IDs of the members
+        banned. The others should be banned individually.
+        """
+        bulk_ban = getattr(guild, "bulk_ban", None)
+        if bulk_ban is None:
+            # older discord.py versions
+            bulk_ban = functools.partial(bulk_ban_fallback, guild)
+        banned = set()
+        for i in range(0, len(members), BULK_BAN_LIMIT):
+            chunk = members[i : i + BULK_BAN_LIMIT]
+            reason = audit_reason.format(member=_("{count} members").format(count=len(chunk)))
+            try:
+                result = await bulk_ban(
+                    chunk, reason=reason, delete_message_seconds=delete_message_days * 86400
+                )
+            except discord.errors.HTTPException as e:
+                log.warn(
+                    f"[Guild {guild.id}] Failed to ban {len(chunk)} members in bulk, they will "
+                    "be banned individually.",
+                    exc_info=e,
+                )
+                continue
+            banned.update(x.id for x in result.banned)
+        return banned
+
     async def _start_timer(self, guild: discord.Guild, member: discord.Member, case: dict) -> bool:
         """Start the timer for a temporary mute/ban."""
         if not case["duration"]:
@@ -239,7 +351,7 @@ class API:
         old_roles = []
         guild = member.guild
         mute_role = guild.get_role(await self.cache.get_mute_role(guild))
-        remove_roles = await self.data.guild(guild).remove_roles()
+        remove_roles = (await self.cache.get_guild_settings(guild))["remove_roles"]
         if not mute_role:
             raise errors.MissingMuteRole("You need to create the mute role before doing this.")
         if remove_roles:
@@ -286,6 +398,22 @@ class API:
         modlog_message: Optional[discord.Message] = None,
     ) -> dict:
         """Create a new case for a member. Don't call this, call warn instead."""
+        data = self._make_case(author, level, time, reason, duration, roles, modlog_message)
+        self.store.append(guild.id, user.id, data)
+        self.cache.add_case_count(guild, user, level)
+        return data
+
+    def _make_case(
+        self,
+        author: Union[discord.Member, str],
+        level: int,
+        time: datetime,
+        reason: Optional[str] = None,
+        duration: Optional[timedelta] = None,
+        roles: Optional[list] = None,
+        modlog_message: Optional[discord.Message] = None,
+    ) -> dict:
+        """Build the body of a case, without saving it."""
         data = {
             "level": level,
             "author": author
@@ -301,8 +429,6 @@ class API:
                 "channel_id": modlog_message.channel.id,
                 "message_id": modlog_message.id,
             }
-        async with self.data.custom("MODLOGS", guild.id, user.id).x() as logs:
-            logs.append(data)
         return data
 
     async def get_case(
@@ -340,18 +466,21 @@ class API:
         ~warnsystem.errors.NotFound
             The case requested doesn't exist.
         """
-        try:
-            case = (await self.data.custom("MODLOGS", guild.id, user.id).x())[index - 1]
-        except IndexError:
+        case = self.store.get(guild.id, user.id, index)
+        if case is None:
             raise errors.NotFound("The case requested doesn't exist.")
-        else:
-            time = case["time"]
-            if time:
-                case["time"] = self._get_datetime(time)
-            return case
+        time = case["time"]
+        if time:
+            case["time"] = self._get_datetime(time)
+        return case
 
     async def get_all_cases(
-        self, guild: discord.Guild, user: Optional[Union[discord.User, discord.Member]] = None
+        self,
+        guild: discord.Guild,
+        user: Optional[Union[discord.User, discord.Member]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        newest_first: bool = False,
     ) -> list:
         """
         Get all cases for a member of a guild.
@@ -363,12 +492,20 @@ class API:
         user: Optional[Union[discord.User, discord.Member]]
             The user you want to get the cases from. If this arguments is omitted, all cases of
             the guild are returned.
+        limit: Optional[int]
+            The maximum number of cases to return. All cases are returned if omitted.
+        offset: int
+            The number of cases to skip, after sorting.
+        newest_first: bool
+            Set to :py:obj:`True` to sort the cases from the newest to the oldest. Combined with
+            ``limit`` and ``offset``, this allows paging through a long history without loading
+            it entirely.
 
         Returns
         -------
         list
             A list of all cases of a user/guild. The cases are sorted from the oldest to the
-            newest.
+            newest, unless you set ``newest_first``.
 
             If you specified a user, you should get something like this:
 
@@ -403,25 +540,65 @@ class API:
                 }
         """
         if user:
-            return await self.data.custom("MODLOGS", guild.id, user.id).x()
-        logs = await self.data.custom("MODLOGS", guild.id).all()
-        all_cases = []
-        for member, content in logs.items():
-            if member == "x":
-                continue
-            for log in content["x"]:
-                time = log["time"]
-                if time:
-                    log["time"] = self._get_datetime(time)
-                # gotta get that state somehow
-                log["member"] = self.bot.get_user(int(member)) or UnavailableMember(
-                    self.bot, self.bot.user._state, member
-                )
-                log["author"] = self.bot.get_user(int(log["author"])) or UnavailableMember(
-                    self.bot, self.bot.user._state, log["author"]
-                )
-                all_cases.append(log)
-        return sorted(all_cases, key=lambda x: x["time"])  # sorted from oldest to newest
+            return self.store.get_all(guild.id, user.id, limit, offset, newest_first)
+        return list(self._iter_guild_cases(guild, limit, offset, newest_first))
+
+    def _iter_guild_cases(
+        self,
+        guild: discord.Guild,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        newest_first: bool = False,
+    ):
+        """
+        Yield the cases of a guild with the members and the dates resolved, see
+        :meth:`get_all_cases`.
+        """
+        users = {}
+
+        def get_user(user_id: int):
+            # the same members and moderators come back a lot, resolve them once
+            try:
+                return users[user_id]
+            except KeyError:
+                pass
+            # gotta get that state somehow
+            user = self.bot.get_user(int(user_id)) or UnavailableMember(
+                self.bot, self.bot.user._state, user_id
+            )
+            users[user_id] = user
+            return user
+
+        for member, log in self.store.get_guild(guild.id, limit, offset, newest_first):
+            time = log["time"]
+            if time:
+                log["time"] = self._get_datetime(time)
+            log["member"] = get_user(member)
+            log["author"] = get_user(log["author"])
+            yield log
+
+    async def count_cases(
+        self, guild: discord.Guild, user: Optional[Union[discord.User, discord.Member]] = None
+    ) -> int:
+        """
+        Get the number of cases of a member, or of the entire guild.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild where you want to count the cases.
+        user: Optional[Union[discord.User, discord.Member]]
+            The user you want to count the cases of. If this arguments is omitted, all cases of
+            the guild are counted.
+
+        Returns
+        -------
+        int
+            The number of cases.
+        """
+        if user:
+            return sum(self.cache.get_case_counts(guild, user).values())
+        return self.store.count_guild(guild.id)
 
     async def edit_case(
         self,
@@ -462,10 +639,60 @@ class API:
         case = await self.get_case(guild, user, index)
         case["reason"] = new_reason
         case["time"] = int(case["time"].timestamp())
-        async with self.data.custom("MODLOGS", guild.id, user.id).x() as logs:
-            logs[index - 1] = case
+        self.store.edit(guild.id, user.id, index, case)
         return True
 
+    async def delete_case(
+        self, guild: discord.Guild, user: Union[discord.User, discord.Member], index: int
+    ) -> dict:
+        """
+        Remove a case from a member's modlog. The following cases are moved back by one.
+
+        .. note:: This only removes the case from the modlog, no action is reverted and the
+            modlog message is kept.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild where you want to remove the case from.
+        user: Union[discord.User, discord.Member]
+            The user you want to remove the case from.
+        index: int
+            The number of the case you want to remove.
+
+        Returns
+        -------
+        dict
+            The case that was removed, with the same body as :func:`get_case` except the time
+            which is kept as a timestamp.
+
+        Raises
+        ------
+        ~warnsystem.errors.NotFound
+            The case requested doesn't exist.
+        """
+        case = self.store.delete(guild.id, user.id, index)
+        if case is None:
+            raise errors.NotFound("The case requested doesn't exist.")
+        self.cache.remove_case_count(guild, user, case["level"])
+        return case
+
+    async def delete_all_cases(
+        self, guild: discord.Guild, user: Union[discord.User, discord.Member]
+    ):
+        """
+        Clear the entire modlog of a member.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild where you want to clear the modlog.
+        user: Union[discord.User, discord.Member]
+            The user you want to clear the modlog of.
+        """
+        self.store.clear(guild.id, user.id)
+        self.cache.clear_case_counts(guild, user)
+
     async def get_modlog_channel(
         self, guild: discord.Guild, level: Optional[Union[int, str]] = None
     ) -> discord.TextChannel:
@@ -532,11 +759,12 @@ class API:
             elif isinstance(level, int) and not 1 <= level <= 5:
                 raise errors.InvalidLevel(msg)
 
+        channels = (await self.cache.get_guild_settings(guild))["channels"]
         if level == "all":
-            return await self.data.guild(guild).channels.all()
-        default_channel = await self.data.guild(guild).channels.main()
+            return dict(channels)
+        default_channel = channels["main"]
         if level:
-            channel = await self.data.guild(guild).channels.get_raw(str(level))
+            channel = channels[str(level)]
         else:
             return default_channel
 
@@ -603,13 +831,11 @@ class API:
         if not reason:
             reason = _("No reason was provided.")
             mod_message = _("\nEdit this with `[p]warnings {id}`").format(id=member.id)
-        logs = await self.data.custom("MODLOGS", guild.id, member.id).x()
+        counts = self.cache.get_case_counts(guild, member)
 
         # prepare the status field
-        total_warns = len(logs) + 1
-        total_type_warns = (
-            len([x for x in logs if x["level"] == level]) + 1
-        )  # number of warns of the received type
+        total_warns = sum(counts.values()) + 1
+        total_type_warns = counts.get(level, 0) + 1  # number of warns of the received type
 
         # a lambda that returns a string; if True is given, a third person sentence is returned
         # (modlog), if False is given, a first person sentence is returned (DM user)
@@ -626,13 +852,14 @@ class API:
 
         # we set any value that can be used multiple times
         invite = None
-        log_description = await self.data.guild(guild).embed_description_modlog.get_raw(level)
+        settings = await self.cache.get_guild_settings(guild)
+        log_description = settings["embed_description_modlog"][str(level)]
         if "{invite}" in log_description:
             try:
                 invite = await guild.create_invite(max_uses=1)
             except Exception:
                 invite = _("*[couldn't create an invite]*")
-        user_description = await self.data.guild(guild).embed_description_user.get_raw(level)
+        user_description = settings["embed_description_user"][str(level)]
         if "{invite}" in user_description and not invite:
             try:
                 invite = await guild.create_invite(max_uses=1)
@@ -678,9 +905,9 @@ class API:
         log_embed.add_field(name=_("Reason"), value=reason + mod_message, inline=False)
         log_embed.add_field(name=_("Status"), value=current_status(True), inline=False)
         log_embed.timestamp = date
-        log_embed.set_thumbnail(url=await self.data.guild(guild).thumbnails.get_raw(level))
-        log_embed.colour = await self.data.guild(guild).colors.get_raw(level)
-        log_embed.url = await self.data.guild(guild).url()
+        log_embed.set_thumbnail(url=settings["thumbnails"][str(level)])
+        log_embed.colour = settings["colors"][str(level)]
+        log_embed.url = settings["url"]
         if link:
             log_embed.set_image(url=link.group())
         if not message_sent:
@@ -702,7 +929,7 @@ class API:
             user_embed.set_field_at(
                 1, name=_("Duration"), value=self._format_timedelta(time), inline=True
             )
-        if not await self.data.guild(guild).show_mod():
+        if not settings["show_mod"]:
             user_embed.remove_field(0)  # called twice, removing moderator field
 
         return (log_embed, user_embed)
@@ -825,7 +1052,7 @@ class API:
         """
         if not reason:
             return
-        substitutions = await self.data.guild(guild).substitutions()
+        substitutions = (await self.cache.get_guild_settings(guild))["substitutions"]
         for key, substitute in substitutions.items():
             reason = reason.replace(f"[{key}]", substitute)
         return reason
@@ -866,6 +1093,9 @@ class API:
             The member that will be warned. It can be an instance of
             :py:class:`warnsystem.api.UnavailableMember` if you need
             to ban someone not in the guild.
+
+            Multiple members are warned concurrently, and their cases are saved together
+            every :py:attr:`MASSWARN_CHECKPOINT` members and at the end.
         author: Union[discord.Member, str]
             The member that called the action, which will be associated to the log.
         level: int
@@ -951,36 +1181,48 @@ class API:
             potential error too.
         """
 
-        async def warn_member(member: Union[discord.Member, UnavailableMember], audit_reason: str):
-            nonlocal i
-            roles = []
+        async def prepare_member(member: Union[discord.Member, UnavailableMember]) -> tuple:
+            # checks and DM, returns the failure if any and the modlog embed
+            modlog_e = None
             # permissions check
             if level > 1 and guild.me.top_role.position <= member.top_role.position:
                 # check if the member is below the bot in the roles's hierarchy
-                return errors.MemberTooHigh(
-                    _(
-                        "Cannot take actions on this member, they are "
-                        "above me in the roles hierarchy. Modify "
-                        "the hierarchy so my top role ({bot_role}) is above {member_role}."
-                    ).format(bot_role=guild.me.top_role.name, member_role=member.top_role.name)
+                return (
+                    errors.MemberTooHigh(
+                        _(
+                            "Cannot take actions on this member, they are "
+                            "above me in the roles hierarchy. Modify "
+                            "the hierarchy so my top role ({bot_role}) is above {member_role}."
+                        ).format(bot_role=guild.me.top_role.name, member_role=member.top_role.name)
+                    ),
+                    None,
                 )
-            if await self.data.guild(guild).respect_hierarchy() and (
+            if respect_hierarchy and (
                 not (await self.bot.is_owner(author) or author.id == guild.owner_id)
                 and member.top_role.position >= author.top_role.position
             ):
-                return errors.NotAllowedByHierarchy(
-                    "The moderator is lower than the member in the servers's role hierarchy."
+                return (
+                    errors.NotAllowedByHierarchy(
+                        "The moderator is lower than the member in the servers's role hierarchy."
+                    ),
+                    None,
                 )
             if level > 2 and member.id == guild.owner_id:
-                return errors.MissingPermissions(
-                    _("I can't take actions on the owner of the guild.")
+                return (
+                    errors.MissingPermissions(
+                        _("I can't take actions on the owner of the guild.")
+                    ),
+                    None,
                 )
             if member == guild.me:
-                return errors.SuicidePrevention(
-                    _(
-                        "Why would you warn me? I did nothing wrong :c\n"
-                        "(use a manual kick/ban instead, warning the bot will cause issues)"
-                    )
+                return (
+                    errors.SuicidePrevention(
+                        _(
+                            "Why would you warn me? I did nothing wrong :c\n"
+                            "(use a manual kick/ban instead, warning the bot will cause issues)"
+                        )
+                    ),
+                    None,
                 )
             # send the message to the user
             if log_modlog or log_dm:
@@ -989,7 +1231,8 @@ class API:
                 )
             if log_dm:
                 try:
-                    await member.send(embed=user_e)
+                    async with dm_limit:
+                        await member.send(embed=user_e)
                 except (discord.errors.Forbidden, errors.UserNotFound):
                     modlog_e = (
                         await self.get_embeds(
@@ -1009,34 +1252,40 @@ class API:
                         f"(ID: {member.id}) because of an HTTPException.",
                         exc_info=e,
                     )
+            return None, modlog_e
+
+        async def finish_member(
+            member: Union[discord.Member, UnavailableMember],
+            modlog_e: Optional[discord.Embed],
+            action_taken: bool = False,
+        ):
+            # moderation action (unless it was already done in bulk) and log
+            nonlocal i
+            roles = []
             # take actions
-            if take_action:
-                audit_reason = audit_reason.format(member=member)
+            if take_action and not action_taken:
+                member_audit_reason = audit_reason.format(member=member)
                 try:
-                    if level == 2:
-                        roles = await self._mute(member, audit_reason)
-                    elif level == 3:
-                        await guild.kick(member, reason=audit_reason)
-                    elif level == 4:
-                        await guild.ban(
-                            member,
-                            reason=audit_reason,
-                            delete_message_days=ban_days
-                            or await self.data.guild(guild).bandays.softban(),
-                        )
-                        await guild.unban(
-                            member,
-                            reason=_(
-                                "Unbanning the softbanned member after cleaning up the messages."
-                            ),
-                        )
-                    elif level == 5:
-                        await guild.ban(
-                            member,
-                            reason=audit_reason,
-                            delete_message_days=ban_days
-                            or await self.data.guild(guild).bandays.ban(),
-                        )
+                    async with action_limit:
+                        if level == 2:
+                            roles = await self._mute(member, member_audit_reason)
+                        elif level == 3:
+                            await guild.kick(member, reason=member_audit_reason)
+                        elif level == 4:
+                            await guild.ban(
+                                member, reason=member_audit_reason, delete_message_days=delete_days
+                            )
+                            await guild.unban(
+                                member,
+                                reason=_(
+                                    "Unbanning the softbanned member after cleaning up the "
+                                    "messages."
+                                ),
+                            )
+                        elif level == 5:
+                            await guild.ban(
+                                member, reason=member_audit_reason, delete_message_days=delete_days
+                            )
                 except discord.errors.HTTPException as e:
                     log.warn(
                         f"[Guild {guild.id}] Failed to warn {member} because of "
@@ -1046,25 +1295,65 @@ class API:
                     return e
             # actions were taken, time to log
             if log_modlog:
-                modlog_message = await mod_channel.send(embed=modlog_e)
+                async with modlog_limit:
+                    modlog_message = await mod_channel.send(embed=modlog_e)
             else:
                 modlog_message = None
-            data = await self._create_case(
-                guild, member, author, level, date, reason, time, roles, modlog_message
-            )
-            # start timer if there is a temporary warning
-            if time and (level == 2 or level == 5):
-                await self._start_timer(guild, member, data)
-            if automod:
-                # This function can be pretty heavy, and the response can be seriously delayed
-                # because of this, so we make it a side process instead
-                self.bot.loop.create_task(
-                    self.automod_check_for_autowarn(guild, member, author, level)
-                )
+            data = self._make_case(author, level, date, reason, time, roles, modlog_message)
+            pending.append((member, data))
+            if len(pending) >= self.MASSWARN_CHECKPOINT:
+                await flush_cases()
             i += 1
             if progress_tracker:
                 await progress_tracker(i)
 
+        async def flush_cases():
+            # the cases are written in a single transaction, then the follow-up work is done
+            batch = pending.copy()
+            pending.clear()
+            if not batch:
+                return
+            self.store.append_many((guild.id, member.id, data) for member, data in batch)
+            for member, data in batch:
+                self.cache.add_case_count(guild, member, level)
+                # start timer if there is a temporary warning
+                if time and (level == 2 or level == 5):
+                    await self._start_timer(guild, member, data)
+                if automod:
+                    # This function can be pretty heavy, and the response can be seriously
+                    # delayed because of this, so we make it a side process instead
+                    self.schedule_autowarn_check(guild, member, author, level)
+
+        async def warn_member(member: Union[discord.Member, UnavailableMember]):
+            fail, modlog_e = await prepare_member(member)
+            if fail:
+                return fail
+            return await finish_member(member, modlog_e)
+
+        async def run_workers(items: Iterable, job: Callable[..., Awaitable]):
+            # the iterator is shared, each item is taken by a single worker
+            items = iter(items)
+            error = None
+
+            async def worker():
+                nonlocal error
+                for item in items:
+                    if error:
+                        return
+                    if not item:
+                        continue
+                    try:
+                        fails.append(await job(item))
+                    except Exception as e:
+                        # let the other workers finish their current item, then stop
+                        error = error or e
+                        return
+
+            await asyncio.gather(*[worker() for x in range(self.MASSWARN_WORKERS)])
+            if error:
+                # raise the first error, like when the members were warned one by one
+                raise error
+
         if not 1 <= level <= 5:
             raise errors.InvalidLevel("The level must be between 1 and 5.")
         # we get the modlog channel now to make sure it exists before doing anything
@@ -1129,8 +1418,47 @@ class API:
         if not date:
             date = datetime.utcnow()
 
+        settings = await self.cache.get_guild_settings(guild)
+        respect_hierarchy = settings["respect_hierarchy"]
+        if level == 4:
+            delete_days = ban_days or settings["bandays"]["softban"]
+        elif level == 5:
+            delete_days = ban_days or settings["bandays"]["ban"]
+        # each route has its own limit, discord.py still handles the rate limits but we avoid
+        # sending hundreds of requests at once that would wait for the same bucket
+        dm_limit = asyncio.Semaphore(self.MASSWARN_DM_CONCURRENCY)
+        action_limit = asyncio.Semaphore(self.MASSWARN_ACTION_CONCURRENCY)
+        modlog_limit = asyncio.Semaphore(self.MASSWARN_MODLOG_CONCURRENCY)
+
         i = 0
-        fails = [await warn_member(x, audit_reason) for x in members if x]
+        fails = []
+        pending = []
+        try:
+            if take_action and level == 5:
+                members = list(filter(None, members))
+            if take_action and level == 5 and len(members) > 1:
+                # DMs must be sent before the ban, then everyone is banned in a few requests
+                prepared = []
+
+                async def prepare(member):
+                    fail, modlog_e = await prepare_member(member)
+                    if not fail:
+                        prepared.append((member, modlog_e))
+                    return fail
+
+                await run_workers(members, prepare)
+                banned = await self._bulk_ban(
+                    guild, [x[0] for x in prepared], audit_reason, delete_days
+                )
+                # members that couldn't be banned in bulk are banned individually
+                await run_workers(
+                    prepared, lambda x: finish_member(*x, action_taken=x[0].id in banned)
+                )
+            else:
+                await run_workers(members, warn_member)
+        finally:
+            # the actions already taken must be logged
+            await flush_cases()
         # all good!
         return list(filter(None, fails))
 
@@ -1177,13 +1505,17 @@ class API:
                     )
 
         now = datetime.utcnow()
-        for guild in self.bot.guilds:
-            data = await self.cache.get_temp_action(guild)
-            if not data:
+        expired = {}
+        for guild_id, member_id, action in self.cache.get_expired_temp_actions():
+            expired.setdefault(guild_id, {})[member_id] = action
+        for guild_id, data in expired.items():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None or guild.unavailable:
+                # the guild may only be unavailable for a while (outage), try again later
+                self.cache.delay_temp_actions(guild_id, self.TEMP_ACTIONS_RETRY_DELAY)
                 continue
             to_remove = []
             for member_id, action in data.items():
-                member_id = int(member_id)
                 try:
                     taken_on = self._get_datetime(action["time"])
                     duration = self._get_timedelta(action["duration"])
@@ -1218,42 +1550,41 @@ class API:
                     time=self._format_timedelta(duration),
                     reason=case_reason,
                 )
-                if (taken_on + duration) < now:
-                    # end of warn
-                    try:
-                        if level == 2:
-                            await self._unmute(member, reason=reason, old_roles=roles)
-                        if level == 5:
-                            await guild.unban(member, reason=reason)
-                            if await self.data.guild(guild).reinvite():
-                                await reinvite(
-                                    guild,
-                                    member,
-                                    case_reason,
-                                    self._format_timedelta(timedelta(seconds=action["duration"])),
-                                )
-                    except discord.errors.Forbidden:
-                        log.warn(
-                            f"[Guild {guild.id}] I lost required permissions for "
-                            f"ending the timed {action_str}. Member {member} (ID: {member.id}) "
-                            "will stay as it is now."
-                        )
-                    except discord.errors.HTTPException as e:
-                        log.warn(
-                            f"[Guild {guild.id}] Couldn't end the timed {action_str} of {member} "
-                            f"(ID: {member.id}). He will stay as it is now.",
-                            exc_info=e,
-                        )
-                    else:
-                        log.debug(
-                            f"[Guild {guild.id}] Ended timed {action_str} of {member} (ID: "
-                            f"{member.id}) taken on {self._format_datetime(taken_on)} requested "
-                            f"by {author} (ID: {author.id}) that lasted for "
-                            f"{self._format_timedelta(duration)} for the reason {case_reason}"
-                            f"\nCurrent time: {now}\nExpected end time of warn: "
-                            f"{self._format_datetime(taken_on + duration)}"
-                        )
-                    to_remove.append(member)
+                # end of warn
+                try:
+                    if level == 2:
+                        await self._unmute(member, reason=reason, old_roles=roles)
+                    if level == 5:
+                        await guild.unban(member, reason=reason)
+                        if (await self.cache.get_guild_settings(guild))["reinvite"]:
+                            await reinvite(
+                                guild,
+                                member,
+                                case_reason,
+                                self._format_timedelta(timedelta(seconds=action["duration"])),
+                            )
+                except discord.errors.Forbidden:
+                    log.warn(
+                        f"[Guild {guild.id}] I lost required permissions for "
+                        f"ending the timed {action_str}. Member {member} (ID: {member.id}) "
+                        "will stay as it is now."
+                    )
+                except discord.errors.HTTPException as e:
+                    log.warn(
+                        f"[Guild {guild.id}] Couldn't end the timed {action_str} of {member} "
+                        f"(ID: {member.id}). He will stay as it is now.",
+                        exc_info=e,
+                    )
+                else:
+                    log.debug(
+                        f"[Guild {guild.id}] Ended timed {action_str} of {member} (ID: "
+                        f"{member.id}) taken on {self._format_datetime(taken_on)} requested "
+                        f"by {author} (ID: {author.id}) that lasted for "
+                        f"{self._format_timedelta(duration)} for the reason {case_reason}"
+                        f"\nCurrent time: {now}\nExpected end time of warn: "
+                        f"{self._format_datetime(taken_on + duration)}"
+                    )
+                to_remove.append(member)
             if to_remove:
                 await self.cache.bulk_remove_temp_action(guild, to_remove)
 
@@ -1262,7 +1593,7 @@ class API:
         This is an infinite loop task started with the cog that will check\
         if a temporary warn (mute or ban) is over, and cancel the action if it's true.
 
-        The loop runs every 10 seconds.
+        The loop sleeps until the next temporary warn ends, or until a new one is added.
         """
         await self.bot.wait_until_ready()
         log.debug(
@@ -1288,7 +1619,9 @@ class API:
                 log.error(
                     "Error in loop for unmutes and unbans. The loop will be resumed.", exc_info=e
                 )
-            await asyncio.sleep(10)
+                # don't retry the failed actions in a tight loop
+                await asyncio.sleep(10)
+            await self.cache.wait_for_temp_actions()
 
     # automod stuff
     def enable_automod(self):
@@ -1319,11 +1652,32 @@ class API:
             return False
         if not self.cache.is_automod_enabled(guild):
             return False
-        if await self.bot.is_automod_immune(message):
-            return False
-        if await self.bot.is_mod(member):
-            return False
-        return True
+        # resolving the immunity and mod roles is costly, the result is kept for a short time
+        # the entries are always added at the end, so the first ones expire first
+        key = (guild.id, member.id)
+        now = monotonic()
+        cached = self.automod_eligibility.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        eligible = not (await self.bot.is_automod_immune(message) or await self.bot.is_mod(member))
+        self.automod_eligibility.pop(key, None)
+        self.automod_eligibility[key] = (now + self.AUTOMOD_ELIGIBILITY_TTL, eligible)
+        while next(iter(self.automod_eligibility.values()))[0] <= now:
+            self.automod_eligibility.popitem(last=False)
+        return eligible
+
+    def invalidate_automod_eligibility(
+        self, guild: discord.Guild, member: Optional[discord.Member] = None
+    ):
+        """
+        Forget if the member (or all members of the guild) is immune to the automod, after
+        their roles or the immunity settings changed.
+        """
+        if member is not None:
+            self.automod_eligibility.pop((guild.id, member.id), None)
+            return
+        for key in [x for x in self.automod_eligibility if x[0] == guild.id]:
+            del self.automod_eligibility[key]
 
     async def automod_on_message(self, message: discord.Message):
         if not await self._check_if_automod_valid(message):
@@ -1358,58 +1712,185 @@ class API:
                 exc_info=e,
             )
 
-    async def _safe_regex_search(self, regex: re.Pattern, message: discord.Message):
+    def _record_regex_timings(self, guild: discord.Guild, all_regex: dict, timings: dict):
+        """
+        Save the time taken by each pattern and move the ones consistently slow to the slow
+        pool (or back to the main pool once they're fast again).
+
+        Statistics are kept in memory as guild ID > regex name > histogram, they're reset if
+        the pattern is edited.
+        """
+        stats = self.regex_stats.setdefault(guild.id, {})
+        slow = self.slow_regex.setdefault(guild.id, set())
+        for name, duration in timings.items():
+            regex = all_regex.get(name)
+            if regex is None:
+                continue
+            histogram = stats.get(name)
+            if histogram is None or histogram.pattern != regex["regex"].pattern:
+                histogram = stats[name] = LatencyHistogram(pattern=regex["regex"].pattern)
+                slow.discard(name)
+            histogram.add(duration)
+            if len(histogram.recent) < 20:
+                continue  # not enough samples to judge
+            median = histogram.recent_median()
+            if name not in slow and median >= self.regex_slow_threshold:
+                slow.add(name)
+                log.warning(
+                    f"[Guild {guild.id}] Automod: regex {name} is slow (median of "
+                    f"{median:.3f}s), moving it to the low priority pool."
+                )
+            elif name in slow and median < self.regex_slow_threshold / 2:
+                slow.discard(name)
+                log.info(
+                    f"[Guild {guild.id}] Automod: regex {name} is fast again, moving it back "
+                    "to the main pool."
+                )
+
+    async def _safe_matcher_search(
+        self,
+        matcher: RegexMatcher,
+        message: discord.Message,
+        dispatcher: Optional[RegexDispatcher] = None,
+    ) -> Optional[SearchResult]:
+        """
+        Search all the regex of a guild at once, in the same process pool as
+        :meth:`_safe_regex_search`.
+
+        Returns the result of the search, or :py:obj:`None` if the search failed or was
+        stopped at the timeout. The regex must then be searched one by one to find the one
+        causing problems.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            The pool didn't answer in time. This doesn't tell if a pattern is slow.
+        """
+        guild = message.guild
+        try:
+            result = await (dispatcher or self.re_dispatcher).search(matcher, message.content)
+        except asyncio.TimeoutError:
+            raise
+        except Exception:
+            log.error(
+                f"[Guild {guild.id}] Automod combined regex encountered an error. "
+                "Searching the patterns one by one.",
+                exc_info=True,
+            )
+            return None
+        if result.duration >= self.regex_timeout:
+            log.warning(
+                f"[Guild {guild.id}] Automod: combined regex process took too long. "
+                "Searching the patterns one by one."
+            )
+            return None
+        return result
+
+    async def _safe_regex_search(
+        self,
+        regex: re.Pattern,
+        message: discord.Message,
+        dispatcher: Optional[RegexDispatcher] = None,
+    ):
         """
         Mostly safe regex search to prevent reDOS from user defined regex patterns
 
         This works by running the regex pattern inside a process pool defined at the
-        cog level and then checking that process in the default executor to keep
-        things asynchronous. If the process takes too long to complete we log a
-        warning and remove the trigger from trying to run again.
+        cog level, the result being sent back to the event loop by the pool's callback.
+        Returns a tuple of a bool and the matches. The bool is :py:obj:`False` only if the
+        pattern, searched alone, reached the timeout in the process. The caller then deletes
+        the trigger from the guild's settings. If the pool doesn't answer in time or the
+        search fails, the trigger is kept and the message is not checked against it.
 
         This function was fully made by TrustyJAID for Trusty-cogs/retrigger (amazing cog btw)
         https://github.com/TrustyJAID/Trusty-cogs/blob/f08a88040dcc67291a463517a70dcbbe702ba8e3/retrigger/triggerhandler.py#L494
         """
         guild = message.guild
         try:
-            process = self.re_pool.apply_async(regex.findall, (message.content,))
-            task = functools.partial(process.get, timeout=self.regex_timeout)
-            new_task = self.bot.loop.run_in_executor(None, task)
-            search = await asyncio.wait_for(new_task, timeout=self.regex_timeout + 5)
-        except TimeoutError:
-            error_msg = (
-                f"[Guild {guild.id}] Automod: regex process took too long. "
-                f"Removing from memory. Offending regex: {regex.pattern}"
+            # sent alone, the duration measured by the process only comes from this pattern
+            search = await (dispatcher or self.re_dispatcher).search(
+                RegexMatcher({regex.pattern: regex}), message.content, batch=False
             )
-            log.warning(error_msg)
-            return (False, [])
-            # we certainly don't want to be performing multiple triggers if this happens
         except asyncio.TimeoutError:
-            error_msg = (
-                f"[Guild {guild.id}] Automod: regex asyncio timed out. "
-                f"Removing from memory. Offending regex: {regex.pattern}"
+            log.warning(
+                f"[Guild {guild.id}] Automod: the regex pool didn't answer in time, "
+                f"the message was not checked against {regex.pattern}"
             )
-            log.warning(error_msg)
-            return (False, [])
+            return (True, [])
         except Exception:
             log.error(
                 f"[Guild {guild.id}] Automod regex encountered an error with {regex.pattern}",
                 exc_info=True,
             )
             return (True, [])
-        else:
-            return (True, search)
+        if search.duration >= self.regex_timeout:
+            log.warning(
+                f"[Guild {guild.id}] Automod: regex searched alone reached the timeout of "
+                f"{self.regex_timeout}s in the process. The trigger will be deleted from the "
+                f"guild's settings. Offending regex: {regex.pattern}"
+            )
+            return (False, [])
+        return (True, search.found)
+
+    async def _search_automod_regex(
+        self,
+        all_regex: dict,
+        matcher: Optional[RegexMatcher],
+        message: discord.Message,
+        dispatcher: RegexDispatcher,
+    ) -> List[str]:
+        if matcher is None:
+            return []
+        guild = message.guild
+        try:
+            result = await self._safe_matcher_search(matcher, message, dispatcher)
+        except asyncio.TimeoutError:
+            # the pool is busy, searching the patterns one by one would only queue more jobs
+            log.warning(
+                f"[Guild {guild.id}] Automod: the regex pool didn't answer in time, "
+                "the message was not checked."
+            )
+            return []
+        if result is not None:
+            if result.timings:
+                self._record_regex_timings(guild, all_regex, result.timings)
+            return result.found
+        triggered = []
+        for name in matcher.patterns:
+            regex = all_regex.get(name)
+            if regex is None:
+                continue
+            result = await self._safe_regex_search(regex["regex"], message, dispatcher)
+            if result[1]:
+                triggered.append(name)
+            elif result[0] is False:
+                await self.cache.remove_automod_regex(guild, name)
+        return triggered
 
     async def automod_process_regex(self, message: discord.Message):
         guild = message.guild
         member = message.author
         all_regex = await self.cache.get_automod_regex(guild)
-        for name, regex in all_regex.items():
-            result = await self._safe_regex_search(regex["regex"], message)
-            if not result[1]:
-                if result[0] is False:
-                    await self.cache.remove_automod_regex(guild, name)
-                continue
+        if not all_regex:
+            return
+        index = await self.cache.get_automod_matcher(guild)
+        # only the patterns whose literals are in the message are searched
+        names = index.get_candidates(message.content)
+        if not names:
+            return
+        slow = names & self.slow_regex.get(guild.id, set())
+        results = await asyncio.gather(
+            self._search_automod_regex(
+                all_regex, index.get_matcher(names - slow), message, self.re_dispatcher
+            ),
+            self._search_automod_regex(
+                all_regex, index.get_matcher(slow), message, self.re_slow_dispatcher
+            ),
+        )
+        for name in results[0] + results[1]:
+            regex = all_regex.get(name)
+            if regex is None:
+                continue  # removed in the meantime
             time = None
             if regex["time"]:
                 time = self._get_timedelta(regex["time"])
@@ -1433,8 +1914,8 @@ class API:
 
     async def automod_process_antispam(self, message: discord.Message):
         # we store the data in self.antispam
-        # keys are as follow: GUILD_ID > CHANNEL_ID > MEMBER_ID = tuple
-        # tuple contains list timestamps of recent messages + check if the member was warned
+        # keys are as follow: (GUILD_ID, CHANNEL_ID, MEMBER_ID) = SpamWindow
+        # the window contains the timestamps of recent messages + the time of the last text warn
         # if the antispam is triggered once, we send a message in the chat (refered as text warn)
         # if it's triggered a second time, an actual warn is given
         guild = message.guild
@@ -1443,96 +1924,67 @@ class API:
         antispam_data = await self.cache.get_automod_antispam(guild)
         if antispam_data is False:
             return
-        for word in antispam_data["whitelist"]:
-            if word in message.content:
-                return
-
-        # we slowly go across each key, if it doesn't exist, data is created then the
-        # function ends since there's no data to check
-        InitialData = namedtuple("InitialData", ["messages", "warned"])
-        data = InitialData(messages=[], warned=False)
-        try:
-            guild_data = self.antispam[guild.id]
-        except KeyError:
-            self.antispam[guild.id] = {channel.id: {member.id: data}}
+        if self.cache.is_antispam_whitelisted(guild, message.content):
             return
-        else:
-            pass
-        try:
-            channel_data = guild_data[channel.id]
-        except KeyError:
-            self.antispam[guild.id][channel.id] = {member.id: data}
-            return
-        else:
-            del guild_data
-        try:
-            data = channel_data[member.id]
-        except KeyError:
-            pass
-        del channel_data
 
-        data.messages.append(message.created_at)
-        # now we've got our list of timestamps, just gotta clean the old ones
-        data = data._replace(
-            messages=self._automod_clean_old_messages(
-                antispam_data["delay"], message.created_at, data.messages
-            )
+        max_messages = antispam_data["max_messages"]
+        delay_before_action = antispam_data["delay_before_action"]
+        timestamp = message.created_at.timestamp()
+        data = self.antispam.get(
+            guild.id,
+            channel.id,
+            member.id,
+            max_messages,
+            timestamp,
+            max(antispam_data["delay"], delay_before_action),
         )
-        if len(data.messages) <= antispam_data["max_messages"]:
+        if data.add(timestamp, antispam_data["delay"]) <= max_messages:
             # antispam not triggered, we can exit now
-            self.antispam[guild.id][channel.id][member.id] = data
             return
         # at this point, user is considered to be spamming
         # we cleanup their x last messages (max_messages + 1), then either send a text warn
         # or perform an actual warnsystem warn (I'm confusing ik)
-        if (
-            data.warned is False
-            or (datetime.now() - data.warned).total_seconds()
-            < antispam_data["delay_before_action"]
+        if delay_before_action and (
+            data.warned is None or timestamp - data.warned > delay_before_action
         ):
-            bot_message = await channel.send(
+            await channel.send(
                 _("{member} you're sending messages too fast!").format(member=member.mention),
                 delete_after=5,
             )
-            data = InitialData(messages=[], warned=bot_message.created_at)
         else:
             # already warned once within delay_before_action, gotta take actions
-            warn_data = antispam_data["warn"]
-            warn_data["author"] = guild.me
+            warn_data = dict(antispam_data["warn"], author=guild.me)
             if warn_data["time"]:
                 warn_data["time"] = self._get_timedelta(warn_data["time"])
             try:
                 self.antispam_warn_queue[guild.id][member] = warn_data
             except KeyError:
                 self.antispam_warn_queue[guild.id] = {member: warn_data}
-            # also reset the data
-            data = InitialData(messages=[], warned=message.created_at)
-        self.antispam[guild.id][channel.id][member.id] = data
+        # also reset the data
+        data.reset(timestamp)
 
-    def _automod_clean_old_messages(self, delay: int, current_time: datetime, messages: list):
-        """
-        We don't keep messages older than the delay in the cache
-        """
-        message: datetime
-        delta: timedelta
-        new_list = []
-        for message in messages:
-            delta = current_time - message
-            if delta.total_seconds() <= delay:
-                new_list.append(message)
-        return new_list
-
-    def _automod_clean_cache(
-        self, guild: discord.Guild, channel: discord.TextChannel, member: discord.Member
+    def schedule_autowarn_check(
+        self, guild: discord.Guild, member: discord.Member, author: discord.Member, level: int
     ):
         """
-        We quickly end up with a dict filled with empty values, we gotta clean that.
+        Look for possible automatic warns on a member after a short delay.
+
+        The warns received in the meantime are checked together, so a burst of warns only
+        reads the modlog once.
         """
-        del self.automod[guild.id][channel.id][member.id]
-        if not self.automod[guild.id][channel.id]:
-            del self.automod[guild.id][channel.id]
-            if not self.automod[guild.id]:
-                del self.automod[guild.id]
+        key = (guild.id, member.id)
+        pending = self.autowarn_queue.get(key)
+        if pending is None:
+            pending = self.autowarn_queue[key] = (member, [])
+            self.bot.loop.call_later(self.AUTOWARN_DELAY, self._start_autowarn_check, guild, key)
+        pending[1].append((author.id == self.bot.user.id, level))
+
+    def _start_autowarn_check(self, guild: discord.Guild, key: tuple):
+        if key in self.autowarn_running:
+            # the previous check must end first, it could give the same autowarn
+            self.bot.loop.call_later(self.AUTOWARN_DELAY, self._start_autowarn_check, guild, key)
+            return
+        self.bot.loop.create_task(self._automod_check_for_autowarn(guild, key))
 
     async def automod_check_for_autowarn(
         self, guild: discord.Guild, member: discord.Member, author: discord.Member, level: int
@@ -1543,86 +1995,100 @@ class API:
         Level is the last warning's level, which will filter a lot of possible autowarns and,
         therefore, save performances.
 
+        The check is now scheduled with :meth:`schedule_autowarn_check` and runs after a short
+        delay, together with the other warns received in the meantime.
+        """
+        self.schedule_autowarn_check(guild, member, author, level)
+
+    async def _automod_check_for_autowarn(self, guild: discord.Guild, key: tuple):
+        """
+        Check the warns queued for a member, see :meth:`schedule_autowarn_check`.
+
         This can be a heavy call if there are a lot of possible autowarns and a long modlog.
         """
-        t = datetime.now()
-        try:
-            await self._automod_check_for_autowarn(guild, member, author, level)
-        except Exception as e:
-            log.error(f"[Guild {guild.id}] A problem occured with automod check.", exc_info=e)
-        time_taken: timedelta = datetime.now() - t
-        if time_taken.total_seconds() > 10 and guild.id not in self.warned_guilds:
-            self.warned_guilds.append(guild.id)
+        async with self.autowarn_limit:
+            # the warns received while waiting are checked as well
+            member, warns = self.autowarn_queue.pop(key)
+            self.autowarn_running.add(key)
+            t = monotonic()
+            try:
+                await self._automod_autowarn_member(guild, member, warns)
+            except Exception as e:
+                log.error(f"[Guild {guild.id}] A problem occured with automod check.", exc_info=e)
+            finally:
+                self.autowarn_running.discard(key)
+        time_taken = monotonic() - t
+        stats = self.autowarn_stats.get(guild.id)
+        if stats is None:
+            stats = self.autowarn_stats[guild.id] = LatencyHistogram()
+        stats.add(time_taken)
+        if time_taken > 10 and guild.id not in self.warned_guilds:
+            self.warned_guilds.add(guild.id)
             log.warning(
-                f"[Guild {guild.id}] Automod check took a long time! Time taken: {time_taken}\n"
+                f"[Guild {guild.id}] Automod check took a long time! Time taken: "
+                f"{timedelta(seconds=time_taken)}\n"
                 "Try to reduce the amount of warns/autowarns or blame Laggron for poorly "
                 "written code (second option is preferred).\nThis warning will not show again "
-                "for this guild until reload."
+                "for this guild until reload. See `[p]automod warn stats` for details."
             )
 
-    async def _automod_check_for_autowarn(
-        self, guild: discord.Guild, member: discord.Member, author: discord.Member, level: int
+    async def _automod_autowarn_member(
+        self, guild: discord.Guild, member: discord.Member, warns: list
     ):
         """
         Prevents having to put this whole function into a try/except block.
         """
         if not self.cache.is_automod_enabled(guild):
             return
+        # remove all autowarns that are locked to a specific level
+        # where none of the last warnings' level correspond
+        # also remove autowarns that are automod only if no warn author is the bot
+        # each autowarn counts how many of the last warnings it concerns
+        autowarns = []
+        for autowarn in await self.cache.get_automod_warnings(guild):
+            new_warns = sum(
+                1
+                for by_bot, level in warns
+                if (by_bot or not autowarn["automod_only"])
+                and (autowarn["level"] == 0 or autowarn["level"] == level)
+            )
+            if new_warns:
+                autowarns.append((autowarn, new_warns))
+        if not autowarns:
+            return  # no autowarn to iterate through
+        if sum(self.cache.get_case_counts(guild, member).values()) < min(
+            x["number"] for x, y in autowarns
+        ):
+            return  # not enough warnings in the modlog to trigger any autowarn
         # starting the iteration through warnings can cost performances
         # so we look for conditions that confirms the member cannot be affected by automod
         if await self.bot.is_automod_immune(member):
             return
-        warns = await self.get_all_cases(guild, member)
-        if len(warns) < 2:
-            return  # autowarn can't be triggered with a single warning in the modlog
-        autowarns = await self.data.guild(guild).automod.warnings()
-        # remove all autowarns that are locked to a specific level
-        # where the last warning's level doesn't correspond
-        # also remove autowarns that are automod only if warn author isn't the bot
-
-        def is_autowarn_valid(warn):
-            if author.id != self.bot.user.id and warn["automod_only"]:
-                return False
-            return warn["level"] == 0 or warn["level"] == level
-
-        autowarns = list(filter(is_autowarn_valid, autowarns))
-        if not autowarns:
-            return  # no autowarn to iterate through
-        for i, autowarn in enumerate(autowarns):
-            # prepare for iteration
-            autowarns[i]["count"] = 0
-            # if the condition is met (within the specified time? not an automatic warn?)
-            # we increase this value until reaching the given limit
-            time = autowarn["time"]
-            if time:
-                until = datetime.utcnow() - timedelta(seconds=time)
-                autowarns[i]["until"] = until
-        del time
-        found_warnings = {}  # we fill this list with the valid autowarns, there can be more than 1
-        for warn in warns[::-1]:
-            to_remove = []  # list of autowarns to remove during the iteration (duration expired)
-            taken_on = datetime.fromtimestamp(warn["time"])
-            for i, autowarn in enumerate(autowarns):
-                try:
-                    if autowarn["until"] >= taken_on:
-                        to_remove.append(i)
-                        continue
-                except KeyError:
-                    pass
-                autowarns[i]["count"] += 1
-                if autowarns[i]["count"] == autowarn["number"]:
-                    found_warnings[i] = autowarn["warn"]
-                if autowarns[i]["count"] > autowarn["number"]:
-                    # value exceeded, no need to continue, it's already done for this one warn
-                    to_remove.append(i)
-                    del found_warnings[i]
-            for index in reversed(to_remove):
-                autowarns.pop(index)
-            if not autowarns:
+        # same reference as the time of the cases, see _make_case
+        now = datetime.utcnow().timestamp()
+        # an autowarn is given if its number of warnings was reached by one of the last ones
+        # so the count must go from below the number to at least the number
+        counts = [0] * len(autowarns)
+        limits = [x["number"] + y for x, y in autowarns]  # no need to count further
+        remaining = set(range(len(autowarns)))
+        cases = self.store.get_all(guild.id, member.id, max(limits), newest_first=True)
+        for case in cases:
+            for i in list(remaining):
+                autowarn = autowarns[i][0]
+                if autowarn["time"] and case["time"] <= now - autowarn["time"]:
+                    remaining.discard(i)  # older warnings are out of the interval
+                    continue
+                counts[i] += 1
+                if counts[i] >= limits[i]:
+                    remaining.discard(i)
+            if not remaining:
                 # we could be out of autowarns to check after a certain time
                 # no need to continue the iteration
                 break
-        del to_remove, taken_on, autowarns
+        found_warnings = {}  # we fill this dict with the valid autowarns, there can be more than 1
+        for i, (autowarn, new_warns) in enumerate(autowarns):
+            if counts[i] - new_warns < autowarn["number"] <= counts[i]:
+                found_warnings[i] = autowarn["warn"]
         for i, warn in found_warnings.items():
             try:
                 await self.warn(
@@ -247,6 +247,39 @@ class AutomodMixin(MixinMeta):
         )
         await ctx.send(embed=embed)
 
+    @automod_regex.command(name="stats")
+    async def automod_regex_stats(self, ctx: commands.Context):
+        """
+        Show the time taken by each Regex trigger to search messages.
+
+        Consistently slow triggers are moved to a low priority process, so they don't delay \
+the others. Statistics are kept until the bot restarts.
+        """
+        guild = ctx.guild
+        automod_regex = await self.cache.get_automod_regex(guild)
+        stats = self.api.regex_stats.get(guild.id, {})
+        slow = self.api.slow_regex.get(guild.id, set())
+        text = ""
+        for name, value in automod_regex.items():
+            histogram = stats.get(name)
+            if histogram is None or histogram.pattern != value["regex"].pattern:
+                continue
+            text += _("+ {name} ({pool} pool)\n{summary}\n\n").format(
+                name=name,
+                pool=_("slow") if name in slow else _("main"),
+                summary=histogram.summary(),
+            )
+        if not text:
+            await ctx.send(_("No statistics available yet."))
+            return
+        messages = []
+        pages = list(pagify(text, delims=["\n\n", "\n"], priority=True, page_length=1900))
+        for i, page in enumerate(pages):
+            messages.append(
+                _("Page {i}/{total}").format(i=i + 1, total=len(pages)) + box(page, "diff")
+            )
+        await menus.menu(ctx, pages=messages, controls=menus.DEFAULT_CONTROLS)
+
     @automod_regex.command(name="edited")
     async def automod_regex_edited(self, ctx: commands.Context, enable: bool = None):
         """
@@ -426,6 +459,7 @@ set them a level 3 warning with the given reason.
                     },
                 }
             )
+        self.cache.invalidate_automod_warnings(guild)
         await ctx.send(_("The new automatic warn was successfully saved!"))
 
     @automod_warn.command(name="delete", aliases=["del", "remove"])
@@ -470,6 +504,7 @@ set them a level 3 warning with the given reason.
                 await ctx.send(_("The auto warn wasn't deleted."))
                 return
             warnings.pop(index)
+        self.cache.invalidate_automod_warnings(guild)
         await ctx.send(_("Automated warning successfully deleted."))
 
     @automod_warn.command(name="list")
@@ -478,7 +513,7 @@ set them a level 3 warning with the given reason.
         Lists automated warnings on this server.
         """
         guild = ctx.guild
-        autowarns = await self.data.guild(guild).automod.warnings()
+        autowarns = await self.cache.get_automod_warnings(guild)
         if not autowarns:
             await ctx.send(_("No automatic warn registered."))
             return
@@ -530,6 +565,24 @@ set them a level 3 warning with the given reason.
         )
         await ctx.send(embed=embed)
 
+    @automod_warn.command(name="stats")
+    async def automod_warn_stats(self, ctx: commands.Context):
+        """
+        Show the time taken to look for automated warnings.
+
+        Each time a member is warned, their modlog is checked for automated warnings to give. \
+Statistics are kept until the bot restarts.
+        """
+        guild = ctx.guild
+        stats = self.api.autowarn_stats.get(guild.id)
+        pending = sum(1 for x in self.api.autowarn_queue if x[0] == guild.id)
+        if stats is None:
+            await ctx.send(_("No statistics available yet."))
+            return
+        await ctx.send(
+            _("Checks waiting: {pending}\n").format(pending=pending) + box(stats.summary())
+        )
+
     @automod.group(name="antispam")
     async def automod_antispam(self, ctx: commands.Context):
         """
@@ -702,7 +755,7 @@ automod infractions, like a mute after 3 warns.
                     await ctx.send(_("`{word}` is already in the whitelist.").format(word=word))
                     return
             whitelist.extend(words)
-        await self.cache.update_automod_antispam()
+        await self.cache.update_automod_antispam(guild)
         if len(words) == 1:
             await ctx.send(_("Added one word to the whitelist."))
         else:
@@ -724,8 +777,8 @@ automod infractions, like a mute after 3 warns.
                 if word not in whitelist:
                     await ctx.send(_("`{word}` isn't in the whitelist.").format(word=word))
                     return
-            whitelist = [x for x in whitelist if x not in words]
-        await self.cache.update_automod_antispam()
+            whitelist[:] = [x for x in whitelist if x not in words]
+        await self.cache.update_automod_antispam(guild)
         if len(words) == 1:
             await ctx.send(_("Removed one word from the whitelist."))
         else:
@@ -754,7 +807,7 @@ automod infractions, like a mute after 3 warns.
         """
         guild = ctx.guild
         await self.data.guild(guild).automod.antispam.whitelist.set([])
-        await self.cache.update_automod_antispam()
+        await self.cache.update_automod_antispam(guild)
         await ctx.tick()
 
     @automod_antispam.command(name="info")
@@ -786,13 +839,15 @@ automod infractions, like a mute after 3 warns.
                 "Threshold: **{delay} seconds**\n"
                 "Delay before reset: **{reset_delay} seconds**  "
                 "*(see `{prefix}automod antispam delay` for details about this)*\n"
-                "Number of whitelisted words: {whitelist}"
+                "Number of whitelisted words: {whitelist}\n"
+                "Members currently tracked: {tracked}"
             ).format(
                 max_messages=antispam_settings["max_messages"],
                 delay=antispam_settings["delay"],
                 reset_delay=antispam_settings["delay_before_action"],
                 prefix=ctx.clean_prefix,
                 whitelist=len(antispam_settings["whitelist"]),
+                tracked=self.api.antispam.guild_counts.get(guild.id, 0),
             ),
             inline=False,
         )
@@ -1,15 +1,36 @@
+import asyncio
 import discord
+import heapq
+import itertools
 import logging
 import contextlib
 import re
 
+from collections import OrderedDict
+from datetime import datetime
+from types import MappingProxyType
+
 from redbot.core import Config
 from redbot.core.bot import Red
 
-from typing import Mapping, Optional
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from .matching import LiteralIndex, RegexIndex
+from .store import CaseStore
 
 log = logging.getLogger("red.laggron.warnsystem")
 
+# guild settings not included in the snapshot, they are either cached separately or too big
+SNAPSHOT_EXCLUDED_KEYS = ("temporary_warns", "automod")
+
+
+def _freeze(data):
+    if isinstance(data, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return tuple(_freeze(x) for x in data)
+    return data
+
 
 class MemoryCache:
     """
@@ -17,27 +38,51 @@ class MemoryCache:
     See Github issue #49
     """
 
-    def __init__(self, bot: Red, config: Config):
+    # number of users remembered as non members, see is_non_member
+    NON_MEMBERS_SIZE = 10000
+
+    def __init__(self, bot: Red, config: Config, store: CaseStore):
         self.bot = bot
         self.data = config
+        self.store = store
 
         self.mute_roles = {}
         self.temp_actions = {}
-        self.automod_enabled = []
+        self.automod_enabled = set()
         self.automod_antispam = {}
+        self.automod_whitelists = {}  # guild_id > LiteralIndex of the antispam whitelist
         self.automod_regex = {}
-        self.automod_regex_edited = []
+        self.automod_matchers = {}  # guild_id > RegexIndex of the guild's regex
+        self.automod_regex_versions = itertools.count()  # makes the keys of the matchers unique
+        self.automod_regex_edited = set()
+        self.automod_warnings = {}  # guild_id > list of autowarn rules
+        # (guild_id, user_id) of the users known to not be members, for hackbans
+        self.non_members = OrderedDict()
+        self.case_counts = {}  # (guild_id, member_id) > level > number of cases
+        self.guild_settings = {}  # guild_id > read-only snapshot of the settings
+        # (expiration, guild_id, member_id) of the temporary actions, the first one ends first
+        # removed actions stay in there and are ignored when reached
+        self.temp_actions_heap = []
+        self.temp_actions_changed = asyncio.Event()
 
     async def init_automod_enabled(self):
         for guild_id, data in (await self.data.all_guilds()).items():
             try:
                 if data["automod"]["enabled"] is True:
-                    self.automod_enabled.append(guild_id)
+                    self.automod_enabled.add(guild_id)
                 if data["automod"]["regex_edited_messages"] is True:
-                    self.automod_regex_edited.append(guild_id)
+                    self.automod_regex_edited.add(guild_id)
             except KeyError:
                 pass
 
+    async def init_temp_actions(self):
+        for guild_id, data in (await self.data.all_guilds()).items():
+            temp_actions = {int(x): y for x, y in data.get("temporary_warns", {}).items()}
+            self.temp_actions[guild_id] = temp_actions
+            for member_id, action in temp_actions.items():
+                self._schedule_temp_action(guild_id, member_id, action)
+        self.temp_actions_changed.set()
+
     async def _debug_info(self) -> str:
         """
         Compare the cached data to the Config data. Text is logged (INFO) then returned.
@@ -47,7 +92,7 @@ class MemoryCache:
         config_data = await self.data.all_guilds()
         mute_roles_cached = len(self.mute_roles)
         mute_roles = len([x for x in config_data.values() if x["mute_role"] is not None])
-        guild_temp_actions_cached = len(self.temp_actions)
+        guild_temp_actions_cached = len([x for x in self.temp_actions.values() if x])
         guild_temp_actions = len([x for x in config_data.values() if x["temporary_warns"]])
         temp_actions_cached = sum(len(x) for x in self.temp_actions.values())
         temp_actions = sum((len(x["temporary_warns"]) for x in config_data.values()))
@@ -71,25 +116,30 @@ class MemoryCache:
     async def update_mute_role(self, guild: discord.Guild, role: discord.Role):
         await self.data.guild(guild).mute_role.set(role.id)
         self.mute_roles[guild.id] = role.id
+        self.invalidate_guild_settings(guild)
 
     async def get_temp_action(self, guild: discord.Guild, member: Optional[discord.Member] = None):
-        guild_temp_actions = self.temp_actions.get(guild.id, {})
-        if not guild_temp_actions:
+        guild_temp_actions = self.temp_actions.get(guild.id)
+        if guild_temp_actions is None:
             guild_temp_actions = await self.data.guild(guild).temporary_warns.all()
+            guild_temp_actions = {int(x): y for x, y in guild_temp_actions.items()}
+            # also kept when empty, so we know there's nothing to load for this guild
+            self.temp_actions[guild.id] = guild_temp_actions
             if guild_temp_actions:
-                self.temp_actions[guild.id] = guild_temp_actions
+                for member_id, action in guild_temp_actions.items():
+                    self._schedule_temp_action(guild.id, member_id, action)
+                self.temp_actions_changed.set()
         if member is None:
             return guild_temp_actions
         return guild_temp_actions.get(member.id)
 
     async def add_temp_action(self, guild: discord.Guild, member: discord.Member, data: dict):
+        # the guild must be loaded first, a partial dict would hide the actions in Config
+        guild_temp_actions = await self.get_temp_action(guild)
         await self.data.guild(guild).temporary_warns.set_raw(member.id, value=data)
-        try:
-            guild_temp_actions = self.temp_actions[guild.id]
-        except KeyError:
-            self.temp_actions[guild.id] = {member.id: data}
-        else:
-            guild_temp_actions[member.id] = data
+        guild_temp_actions[member.id] = data
+        self._schedule_temp_action(guild.id, member.id, data)
+        self.temp_actions_changed.set()
 
     async def remove_temp_action(self, guild: discord.Guild, member: discord.Member):
         await self.data.guild(guild).temporary_warns.clear_raw(member.id)
@@ -99,43 +149,222 @@ class MemoryCache:
     async def bulk_remove_temp_action(self, guild: discord.Guild, members: list):
         members = [x.id for x in members]
         warns = await self.get_temp_action(guild)
-        warns = {x: y for x, y in warns.items() if int(x) not in members}
+        warns = {int(x): y for x, y in warns.items() if int(x) not in members}
         await self.data.guild(guild).temporary_warns.set(warns)
         self.temp_actions[guild.id] = warns
 
+    @staticmethod
+    def _get_temp_action_end(action: dict) -> float:
+        try:
+            return int(action["time"]) + int(action["duration"])
+        except (KeyError, TypeError, ValueError):
+            # broken data, expire it now so it gets cleaned
+            return 0
+
+    def _schedule_temp_action(self, guild_id: int, member_id: int, action: dict):
+        heapq.heappush(
+            self.temp_actions_heap, (self._get_temp_action_end(action), guild_id, member_id)
+        )
+
+    def delay_temp_actions(self, guild_id: int, delay: float):
+        """
+        Postpone the expired temporary actions of a guild that can't be reached right now.
+        They're returned again by :meth:`get_expired_temp_actions` after the delay.
+        """
+        now = datetime.utcnow().timestamp()
+        heap = [x for x in self.temp_actions_heap if x[1] != guild_id or x[0] > now]
+        for member_id, action in self.temp_actions.get(guild_id, {}).items():
+            if self._get_temp_action_end(action) <= now:
+                heap.append((now + delay, guild_id, member_id))
+        heapq.heapify(heap)
+        self.temp_actions_heap = heap
+
+    def get_expired_temp_actions(self) -> List[Tuple[int, int, dict]]:
+        """
+        Return the ``(guild_id, member_id, action)`` entries of the temporary actions that are
+        over. They stay scheduled until removed with :meth:`remove_temp_action` or
+        :meth:`bulk_remove_temp_action`.
+        """
+        # same time reference as the cases, see API._create_case
+        now = datetime.utcnow().timestamp()
+        heap = self.temp_actions_heap
+        expired = {}
+        # walk the heap from the root, the children of an entry never end before it
+        indexes = [0] if heap else []
+        while indexes:
+            i = indexes.pop()
+            end, guild_id, member_id = heap[i]
+            if end > now:
+                continue
+            action = self.temp_actions.get(guild_id, {}).get(member_id)
+            # an entry postponed by delay_temp_actions comes after the end of its action
+            if action is not None and self._get_temp_action_end(action) <= end:
+                expired[guild_id, member_id] = action
+            indexes.extend(x for x in (2 * i + 1, 2 * i + 2) if x < len(heap))
+        return [(*key, action) for key, action in expired.items()]
+
+    async def wait_for_temp_actions(self):
+        """
+        Sleep until the next temporary action ends, or until one is added. Returns immediately
+        if one is already over.
+        """
+        self.temp_actions_changed.clear()
+        heap = self.temp_actions_heap
+        # drop the removed actions, we don't want to wake up for them
+        while heap:
+            end, guild_id, member_id = heap[0]
+            action = self.temp_actions.get(guild_id, {}).get(member_id)
+            if action is not None and self._get_temp_action_end(action) <= end:
+                break
+            heapq.heappop(heap)
+        delay = heap[0][0] - datetime.utcnow().timestamp() if heap else None
+        if delay is not None and delay <= 0:
+            return
+        try:
+            await asyncio.wait_for(self.temp_actions_changed.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def get_guild_settings(self, guild: discord.Guild) -> Mapping:
+        """
+        Get a read-only snapshot of the guild's settings, loaded once from Config.
+
+        Nested dicts are read-only mappings too. The snapshot must be invalidated with
+        :meth:`invalidate_guild_settings` after editing the settings.
+        """
+        try:
+            return self.guild_settings[guild.id]
+        except KeyError:
+            pass
+        data = await self.data.guild(guild).all()
+        for key in SNAPSHOT_EXCLUDED_KEYS:
+            data.pop(key, None)
+        settings = _freeze(data)
+        self.guild_settings[guild.id] = settings
+        return settings
+
+    def invalidate_guild_settings(self, guild: discord.Guild):
+        self.guild_settings.pop(guild.id, None)
+
+    def get_case_counts(
+        self, guild: discord.Guild, member: Union[discord.Member, discord.User]
+    ) -> Dict[int, int]:
+        key = (guild.id, int(member.id))
+        try:
+            return self.case_counts[key]
+        except KeyError:
+            pass
+        counts = self.store.count(guild.id, member.id)
+        self.case_counts[key] = counts
+        return counts
+
+    def add_case_count(
+        self, guild: discord.Guild, member: Union[discord.Member, discord.User], level: int
+    ):
+        counts = self.case_counts.get((guild.id, int(member.id)))
+        if counts is None:
+            return  # not loaded yet, will be read from the store on the next call
+        counts[level] = counts.get(level, 0) + 1
+
+    def remove_case_count(
+        self, guild: discord.Guild, member: Union[discord.Member, discord.User], level: int
+    ):
+        counts = self.case_counts.get((guild.id, int(member.id)))
+        if counts is None:
+            return
+        counts[level] = counts.get(level, 1) - 1
+        if not counts[level]:
+            del counts[level]
+
+    def clear_case_counts(
+        self,
+        guild: Optional[discord.Guild] = None,
+        member: Optional[Union[discord.Member, discord.User, int]] = None,
+        guild_ids: Optional[Iterable[int]] = None,
+    ):
+        """
+        Forget the cached counters of a member, a guild or a user in all guilds.
+
+        If the guilds where the user has cases are known, give their IDs with ``guild_ids`` to
+        avoid looking through the counters of all members.
+        """
+        member_id = getattr(member, "id", member)
+        if guild is not None and member_id is not None:
+            self.case_counts.pop((guild.id, int(member_id)), None)
+            return
+        if guild_ids is not None and member_id is not None:
+            for guild_id in guild_ids:
+                self.case_counts.pop((guild_id, int(member_id)), None)
+            return
+        for key in list(self.case_counts):
+            if (guild is None or key[0] == guild.id) and (
+                member_id is None or key[1] == int(member_id)
+            ):
+                del self.case_counts[key]
+
     def is_automod_enabled(self, guild: discord.Guild):
         return guild.id in self.automod_enabled
 
     async def add_automod_enabled(self, guild: discord.Guild):
-        self.automod_enabled.append(guild.id)
+        self.automod_enabled.add(guild.id)
         await self.data.guild(guild).automod.enabled.set(True)
 
     async def remove_automod_enabled(self, guild: discord.Guild):
-        self.automod_enabled.remove(guild.id)
+        self.automod_enabled.discard(guild.id)
         await self.data.guild(guild).automod.enabled.set(False)
 
     async def get_automod_antispam(self, guild: discord.Guild):
         automod_antispam = self.automod_antispam.get(guild.id, None)
         if automod_antispam is not None:
             return automod_antispam
-        automod_antispam = await self.data.guild(guild).automod.antispam.all()
-        if automod_antispam["enabled"] is False:
-            self.automod_antispam[guild.id] = False
-        else:
-            self.automod_antispam[guild.id] = automod_antispam
-        return automod_antispam
+        await self.update_automod_antispam(guild)
+        return self.automod_antispam[guild.id]
 
     async def update_automod_antispam(self, guild: discord.Guild):
         data = await self.data.guild(guild).automod.antispam.all()
         if data["enabled"] is False:
             # if the antispam is disabled, no need to store the entire dict, too heavy
             self.automod_antispam[guild.id] = False
+            self.automod_whitelists.pop(guild.id, None)
         else:
             self.automod_antispam[guild.id] = data
+            # all the words are searched at once in the messages
+            self.automod_whitelists[guild.id] = LiteralIndex({x: {x} for x in data["whitelist"]})
+
+    def is_antispam_whitelisted(self, guild: discord.Guild, content: str) -> bool:
+        """
+        Tell if the message contains a word of the antispam whitelist.
+
+        :meth:`get_automod_antispam` must be called before.
+        """
+        whitelist = self.automod_whitelists.get(guild.id)
+        return bool(whitelist) and whitelist.contains(content)
+
+    async def get_automod_warnings(self, guild: discord.Guild) -> list:
+        """
+        Return the autowarn rules of the guild. The list must not be edited.
+        """
+        automod_warnings = self.automod_warnings.get(guild.id)
+        if automod_warnings is None:
+            automod_warnings = await self.data.guild(guild).automod.warnings()
+            self.automod_warnings[guild.id] = automod_warnings
+        return automod_warnings
+
+    def invalidate_automod_warnings(self, guild: discord.Guild):
+        self.automod_warnings.pop(guild.id, None)
+
+    def is_non_member(self, guild: discord.Guild, user_id: int) -> bool:
+        return (guild.id, user_id) in self.non_members
+
+    def add_non_member(self, guild: discord.Guild, user_id: int):
+        self.non_members[(guild.id, user_id)] = True
+        if len(self.non_members) > self.NON_MEMBERS_SIZE:
+            self.non_members.popitem(last=False)
 
     async def get_automod_regex(self, guild: discord.Guild):
-        automod_regex = self.automod_regex.get(guild.id, {})
-        if automod_regex:
+        automod_regex = self.automod_regex.get(guild.id)
+        if automod_regex is not None:
+            # can be empty, the guild is known to have no regex then
             return automod_regex
         automod_regex = await self.data.guild(guild).automod.regex()
         for name, regex in automod_regex.items():
@@ -144,6 +373,22 @@ class MemoryCache:
         self.automod_regex[guild.id] = automod_regex
         return automod_regex
 
+    async def get_automod_matcher(self, guild: discord.Guild) -> RegexIndex:
+        """
+        Get the index of the guild's automod regex, which gives the patterns to search for a
+        message. Built again after a change.
+        """
+        index = self.automod_matchers.get(guild.id)
+        if index is not None:
+            return index
+        automod_regex = await self.get_automod_regex(guild)
+        index = RegexIndex(
+            {name: x["regex"] for name, x in automod_regex.items()},
+            key=(guild.id, next(self.automod_regex_versions)),
+        )
+        self.automod_matchers[guild.id] = index
+        return index
+
     async def add_automod_regex(
         self,
         guild: discord.Guild,
@@ -160,6 +405,7 @@ class MemoryCache:
             self.automod_regex[guild.id] = {name: data}
         else:
             self.automod_regex[guild.id][name] = data
+        self.automod_matchers.pop(guild.id, None)
 
     async def remove_automod_regex(self, guild: discord.Guild, name: str):
         await self.data.guild(guild).automod.regex.clear_raw(name)
@@ -167,13 +413,14 @@ class MemoryCache:
             del self.automod_regex[guild.id][name]
         except KeyError:
             pass
+        self.automod_matchers.pop(guild.id, None)
 
     async def set_automod_regex_edited(self, guild: discord.Guild, enable: bool):
         await self.data.guild(guild).automod.regex_edited_messages.set(enable)
-        if enable is False and guild.id in self.automod_regex_edited:
-            self.automod_regex_edited.remove(guild.id)
-        elif enable is True and guild.id not in self.automod_regex_edited:
-            self.automod_regex_edited.append(guild.id)
+        if enable is False:
+            self.automod_regex_edited.discard(guild.id)
+        else:
+            self.automod_regex_edited.add(guild.id)
 
     def is_automod_regex_edited_enabled(self, guild: discord.Guild):
         return guild.id in self.automod_regex_edited
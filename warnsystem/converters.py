@@ -1,5 +1,8 @@
 import argparse
-from typing import List
+import asyncio
+import time
+from datetime import timezone
+from typing import Callable, List
 import discord
 import re
 import logging
@@ -10,11 +13,16 @@ from discord.ext.commands.converter import RoleConverter, MemberConverter
 from redbot.core.commands import BadArgument, Converter, Context
 from redbot.core.commands.converter import TimedeltaConverter
 from redbot.core.i18n import Translator
+from redbot.core.utils.chat_formatting import box
 
 from .api import UnavailableMember
+from .memberindex import MemberIndex
+from .metrics import format_duration
 
 _ = Translator("WarnSystem", __file__)
 log = logging.getLogger("red.laggron.warnsystem")
+user_id_pattern = re.compile(r"(?:<@!?)?([0-9]{15,21})>?$")
+file_id_pattern = re.compile(rb"(?<![0-9])[0-9]{15,21}(?![0-9])")
 
 
 # credit to mikeshardmind (Sinbad) for parse_time
@@ -32,6 +40,29 @@ class NoExitParser(argparse.ArgumentParser):
         raise BadArgument(message)
 
 
+class Step:
+    """
+    A filter of :class:`AdvancedMemberSelect`, evaluated on the mask of the members kept.
+
+    The cost is an estimate of the time taken to check a member, the selectivity is the
+    estimated share of the members kept.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        evaluate: Callable[[int], int],
+        cost: float = 1,
+        selectivity: float = 0.5,
+        barrier: bool = False,
+    ):
+        self.name = name
+        self.evaluate = evaluate
+        self.cost = cost
+        self.selectivity = selectivity
+        self.barrier = barrier
+
+
 class AdvancedMemberSelect:
     """
     Select a lot of members at once with multiple UNIX-like arguments.
@@ -49,6 +80,7 @@ class AdvancedMemberSelect:
     -------------
     --select [member, ...]
     --hackban-select [member, ...]
+    --hackban-no-fetch
     --exclude [member, ...]
     --everyone
     --name <regex>
@@ -82,12 +114,18 @@ class AdvancedMemberSelect:
     --has-less-than-nroles <int>
     --above <role>
     --below <role>
+
+    Debugging
+    ---------
+    --explain
     """
 
-    def non_lurker_members(self, members: List[discord.Member]):
-        if not self._non_lurker_members:
-            self._non_lurker_members = [x for x in members if x.joined_at]
-        return self._non_lurker_members
+    # maximum number of requests sent at the same time to resolve hackban IDs
+    HACKBAN_CONCURRENCY = 5
+    # maximum number of members Discord can look for in a single request
+    HACKBAN_QUERY_SIZE = 100
+    # maximum size of a file of hackban IDs, in bytes
+    HACKBAN_FILE_LIMIT = 1000000
 
     def parse_arguments(self, arguments: str):
         parser = NoExitParser(
@@ -105,7 +143,8 @@ class AdvancedMemberSelect:
 
         parser.add_argument("--everyone", dest="everyone", action="store_true")
         parser.add_argument("--select", dest="select", nargs="+")
-        parser.add_argument("--hackban-select", dest="hackban_select", nargs="+")
+        parser.add_argument("--hackban-select", dest="hackban_select", nargs="*")
+        parser.add_argument("--hackban-no-fetch", dest="hackban_no_fetch", action="store_true")
         parser.add_argument("--exclude", dest="exclude", nargs="+")
         parser.add_argument("--name", dest="name")
         parser.add_argument("--nickname", dest="nickname")
@@ -139,6 +178,8 @@ class AdvancedMemberSelect:
         parser.add_argument("--above", dest="above")
         parser.add_argument("--below", dest="below")
 
+        parser.add_argument("--explain", dest="explain", action="store_true")
+
         return parser.parse_args(arguments)
 
     async def process_arguments(self, args: argparse.Namespace):
@@ -146,7 +187,7 @@ class AdvancedMemberSelect:
         members: List[discord.Member] = []
         unavailable_members: List[UnavailableMember] = []
 
-        if not args.take_action and not args.send_dm and not args.send_modlog:
+        if not args.take_action and not args.send_dm and not args.send_modlog and not args.explain:
             raise BadArgument(
                 _(
                     "I'm not doing anything! Please provide at least one of these "
@@ -157,91 +198,165 @@ class AdvancedMemberSelect:
             raise BadArgument(_("Can't combine `--only-humans` with `--only-bots`."))
 
         if args.everyone:
+            if args.explain:
+                self.explain = _(
+                    "`--everyone` selects the {members} members without any filter.\n"
+                ).format(members=len(guild.members)) + _("Remove `--explain` to perform the warn.")
+                return [], []
             return guild.members, []
-        members = guild.members
+        # each filter gives a mask of the members matching, see MemberIndex
+        index = MemberIndex(guild)
+        # the filters are first resolved, then planned, see _plan
+        steps = []
         if args.name:
-            members = self._name_regex(members, args.name, "name")
+            steps.append(self._name_regex(index, args.name, "name"))
         if args.nickname:
-            members = self._name_regex(members, args.nickname, "nickname")
+            steps.append(self._name_regex(index, args.nickname, "nickname"))
         if args.display_name:
-            members = self._name_regex(members, args.display_name, "display_name")
+            steps.append(self._name_regex(index, args.display_name, "display_name"))
         if args.activity:
-            members = self._status_regex(members, args.activity)
+            steps.append(self._status_regex(index, args.activity))
         if args.only_humans:
-            members = list(filter(lambda x: not x.bot, members))
+            steps.append(Step("only-humans", lambda x: x & (index.all ^ index.bots)))
         if args.only_bots:
-            members = list(filter(lambda x: x.bot, members))
+            steps.append(Step("only-bots", lambda x: x & index.bots))
         if args.joined_before:
-            members = self._join(
-                self.non_lurker_members(members), " ".join(args.joined_before), "before"
-            )
+            steps.append(self._join(index, " ".join(args.joined_before), "before"))
         if args.joined_after:
-            members = self._join(
-                self.non_lurker_members(members), " ".join(args.joined_after), "after"
-            )
+            steps.append(self._join(index, " ".join(args.joined_after), "after"))
+        # those depend on the members already selected
         if args.last_njoins:
-            members = self._last_njoins(self.non_lurker_members(members), args.last_njoins)
+            steps.append(
+                Step("last-njoins", lambda x: index.last_joins(x, args.last_njoins), barrier=True)
+            )
         if args.first_njoins:
-            members = self._first_njoins(self.non_lurker_members(members), args.first_njoins)
+            steps.append(
+                Step(
+                    "first-njoins", lambda x: index.first_joins(x, args.first_njoins), barrier=True
+                )
+            )
 
         if args.has_perm:
-            members = self._perms(members, [args.has_perm], "perm")
+            steps.append(self._perms(index, [args.has_perm], "perm"))
         if args.has_any_perm:
-            members = self._perms(members, args.has_any_perm, "any-perm")
+            steps.append(self._perms(index, args.has_any_perm, "any-perm"))
         if args.has_all_perms:
-            members = self._perms(members, args.has_all_perms, "all-perms")
+            steps.append(self._perms(index, args.has_all_perms, "all-perms"))
         if args.has_none_perms:
-            members = self._perms(members, args.has_none_perms, "none-perms")
+            steps.append(self._perms(index, args.has_none_perms, "none-perms"))
         if args.has_perm_int:
-            members = self._perm_int(members, args.has_perm_int)
+            steps.append(self._perm_int(index, args.has_perm_int))
 
         if args.has_role:
-            members = await self._role(members, [args.has_role], "has-role")
+            steps.append(await self._role(index, [args.has_role], "has-role"))
         if args.has_any_role:
-            members = await self._role(members, args.has_any_role, "has-any-role")
+            steps.append(await self._role(index, args.has_any_role, "has-any-role"))
         if args.has_all_roles:
-            members = await self._role(members, args.has_all_roles, "has-all-roles")
+            steps.append(await self._role(index, args.has_all_roles, "has-all-roles"))
         if args.has_none_roles:
-            members = await self._role(members, args.has_none_roles, "has-none-roles")
+            steps.append(await self._role(index, args.has_none_roles, "has-none-roles"))
         if args.has_no_roles:
-            members = await self._role(members, None, "has-no-roles")
+            steps.append(await self._role(index, None, "has-no-roles"))
         if args.has_exactly_nroles:
-            members = self._nroles(members, args.has_exactly_nroles[0], "exactly")
+            steps.append(self._nroles(index, args.has_exactly_nroles[0], "exactly"))
         if args.has_more_than_nroles:
-            members = self._nroles(members, args.has_more_than_nroles[0], "more")
+            steps.append(self._nroles(index, args.has_more_than_nroles[0], "more"))
         if args.has_less_than_nroles:
-            members = self._nroles(members, args.has_less_than_nroles[0], "less")
+            steps.append(self._nroles(index, args.has_less_than_nroles[0], "less"))
         if args.above:
-            members = await self._role(members, [args.above], "above")
+            steps.append(await self._role(index, [args.above], "above"))
         if args.below:
-            members = await self._role(members, [args.below], "below")
+            steps.append(await self._role(index, [args.below], "below"))
+
+        mask = index.all
+        report = []
+        for step in self._plan(steps):
+            if not mask:
+                report.append(f"{step.name:<16} {'-':>9} {'-':>9} {'skipped':>10}")
+                continue
+            start = time.perf_counter()
+            result = step.evaluate(mask)
+            duration = time.perf_counter() - start
+            if args.explain:
+                report.append(
+                    f"{step.name:<16} {index.count(mask):>9} {index.count(result):>9} "
+                    f"{format_duration(duration):>10}"
+                )
+            mask = result
+        if args.explain:
+            # sent by the command instead of the warn, see convert
+            self.explain = (
+                _("Search plan for {members} members:\n").format(members=index.size)
+                + box(
+                    f"{'filter':<16} {'checked':>9} {'kept':>9} {'time':>10}\n" + "\n".join(report)
+                )
+                + _("Remove `--explain` to perform the warn.")
+            )
+            return [], []
 
+        # the selection replaces the whole server if there was no filter
+        filtered = mask != index.all
+        members = index.select(mask) if filtered or not args.select else []
         if args.exclude:
             members = await self._selection(members, args.exclude, "exclude")
         if args.select:
-            if members == guild.members:
-                members = []
             members = await self._selection(members, args.select, "select")
-        if args.hackban_select:
-            if members == guild.members:
+        if args.hackban_select is not None:
+            if not filtered and not args.select:
                 members = []
-            unavailable_members = await self._unavailable_selection(args.hackban_select)
+            selection = args.hackban_select
+            # long lists of IDs can be sent as text files
+            for attachment in self.ctx.message.attachments:
+                selection = selection + await self._read_attachment_ids(attachment)
+            if not selection:
+                raise BadArgument(
+                    _("Provide user IDs or a text file of IDs with `--hackban-select`.")
+                )
+            unavailable_members = await self._unavailable_selection(
+                selection, fetch=not args.hackban_no_fetch
+            )
 
         if not members and not unavailable_members:
             raise BadArgument(_("The search could't find any member."))
         return members, unavailable_members
 
-    def _name_regex(self, members: List[discord.Member], pattern: str, attribute: str):
+    def _plan(self, steps: List["Step"]) -> List["Step"]:
+        """
+        Order the filters from the cheapest and most selective to the most expensive.
+
+        A filter only checks the members kept by the previous ones, so the expensive ones must
+        come last, when few members are left. Barriers (like ``--last-njoins``) depend on the
+        members selected before them, they are never moved.
+        """
+        plan = []
+        group = []
+        for step in steps + [None]:
+            if step is None or step.barrier:
+                # filters keeping few members for a small cost first
+                group.sort(key=lambda x: x.cost / max(1 - x.selectivity, 0.01))
+                plan.extend(group)
+                group = []
+                if step is not None:
+                    plan.append(step)
+            else:
+                group.append(step)
+        return plan
+
+    def _name_regex(self, index: MemberIndex, pattern: str, attribute: str) -> "Step":
         pattern = re.compile(pattern)
 
         def member_filter(member: discord.Member):
-            if pattern.search(getattr(member, attribute)):
-                return True
-            return False
-
-        return list(filter(member_filter, members))
+            # members without a nickname never match
+            return pattern.search(getattr(member, attribute) or "")
+
+        return Step(
+            attribute.replace("_", "-"),
+            lambda x: index.where(member_filter, index.members, x),
+            cost=20,
+            selectivity=0.1,
+        )
 
-    def _status_regex(self, members: List[discord.Member], pattern: str):
+    def _status_regex(self, index: MemberIndex, pattern: str) -> "Step":
         pattern = re.compile(pattern)
 
         def member_filter(member: discord.Member):
@@ -254,9 +369,14 @@ class AdvancedMemberSelect:
                 return True
             return False
 
-        return list(filter(member_filter, members))
+        return Step(
+            "status",
+            lambda x: index.where(member_filter, index.members, x),
+            cost=30,
+            selectivity=0.05,
+        )
 
-    def _join(self, members: List[discord.Member], date: str, when: str):
+    def _join(self, index: MemberIndex, date: str, when: str) -> "Step":
         try:
             date = parse_time(date)
         except Exception:
@@ -269,46 +389,16 @@ class AdvancedMemberSelect:
                     "- `jan 4 16:09`"
                 ).format(arg=date, state=when)
             )
+        # dates are given in UTC, like the join dates
+        timestamp = date.replace(tzinfo=timezone.utc).timestamp()
+        if when == "before":
+            member_filter = lambda x: x < timestamp
+        else:
+            member_filter = lambda x: x > timestamp
+        return Step(f"joined-{when}", lambda x: index.where(member_filter, index.joined_at, x))
 
-        def member_filter(member: discord.Member):
-            if when == "before" and member.joined_at < date:
-                return True
-            if when == "after" and member.joined_at > date:
-                return True
-            return False
-
-        return list(filter(member_filter, members))
-
-    def _last_njoins(self, members: List[discord.Member], number: int):
-        try:
-            last_member = sorted(members, key=lambda x: x.joined_at, reverse=True)[number]
-        except IndexError:
-            last_member = sorted(members, key=lambda x: x.joined_at, reverse=True)[
-                len(members) - 1
-            ]
-
-        def member_filter(member: discord.Member):
-            if member.joined_at > last_member.joined_at:
-                return True
-            return False
-
-        return list(filter(member_filter, members))
-
-    def _first_njoins(self, members: List[discord.Member], number: int):
-        try:
-            last_member = sorted(members, key=lambda x: x.joined_at)[number]
-        except IndexError:
-            last_member = sorted(members, key=lambda x: x.joined_at)[len(members) - 1]
-
-        def member_filter(member: discord.Member):
-            if member.joined_at < last_member.joined_at:
-                return True
-            return False
-
-        return list(filter(member_filter, members))
-
-    def _perms(self, members: List[discord.Member], permissions: list, requires: str):
-        allowed_permissions = dir(discord.Permissions)
+    def _perms(self, index: MemberIndex, permissions: list, requires: str) -> "Step":
+        allowed_permissions = discord.Permissions.VALID_FLAGS
         for permission in permissions:
             if permission not in allowed_permissions:
                 raise BadArgument(
@@ -317,37 +407,28 @@ class AdvancedMemberSelect:
                         "permission object. Please provide something like this: `send_messages`"
                     ).format(arg=permission, state=requires)
                 )
+        value = discord.Permissions(**{x: True for x in permissions}).value
 
-        def member_filter(member: discord.Member):
-            if requires == "perm":
-                if getattr(member.guild_permissions, permissions[0]):
-                    return True
-            elif requires == "any-perm":
-                if set([x[0] for x in member.guild_permissions if x[1]]).intersection(permissions):
-                    return True
-            elif requires == "all-perms":
-                if set(permissions).issubset([x[0] for x in member.guild_permissions if x[1]]):
-                    return True
-            elif requires == "none-perms":
-                if not set([x[0] for x in member.guild_permissions if x[1]]).intersection(
-                    permissions
-                ):
-                    return True
-            return False
-
-        return list(filter(member_filter, members))
-
-    def _perm_int(self, members: List[discord.Member], permissions: int):
-        def member_filter(member: discord.Member):
-            if member.guild_permissions.value == permissions:
-                return True
-            return False
+        if requires == "perm" or requires == "any-perm":
+            member_filter = lambda x: x & value
+        elif requires == "all-perms":
+            member_filter = lambda x: x & value == value
+        else:
+            member_filter = lambda x: not x & value
+        return Step(
+            f"has-{requires}",
+            lambda x: index.where(member_filter, index.permissions, x),
+            selectivity=0.8 if requires == "none-perms" else 0.2,
+        )
 
-        return list(filter(member_filter, members))
+    def _perm_int(self, index: MemberIndex, permissions: int) -> "Step":
+        return Step(
+            "has-perm-int",
+            lambda x: index.where(lambda y: y == permissions, index.permissions, x),
+            selectivity=0.05,
+        )
 
-    async def _role(
-        self, members: List[discord.Member], _roles: List[discord.Role], requires: str
-    ):
+    async def _role(self, index: MemberIndex, _roles: List[discord.Role], requires: str) -> "Step":
         if _roles:
             roles: List[discord.Role] = []
             for role in _roles:
@@ -362,38 +443,43 @@ class AdvancedMemberSelect:
                         ).format(arg=role, state=requires)
                     )
 
-        def member_filter(member: discord.Member):
-            if requires == "has-role" and roles[0] in member.roles:
-                return True
-            elif requires == "has-any-roles" and set(member.roles).intersection(roles):
-                return True
-            elif requires == "has-all-roles" and set(roles).issubset(member.roles):
-                return True
-            elif requires == "has-none-roles" and not set(member.roles).intersection(roles):
-                return True
-            elif requires == "has-no-roles" and len(member.roles) == 1:
-                return True
-            elif requires == "above" and member.top_role.position > roles[0].position:
-                return True
-            elif requires == "below" and member.top_role.position < roles[0].position:
-                return True
-            return False
-
-        return list(filter(member_filter, members))
-
-    def _nroles(self, members: List[discord.Member], number: int, condition: str):
-        number += 1  # do not count @everyone role
-
-        def member_filter(member: discord.Member):
-            if condition == "exactly" and len(member.roles) == number:
-                return True
-            elif condition == "more" and len(member.roles) > number:
-                return True
-            elif condition == "less" and len(member.roles) < number:
-                return True
-            return False
-
-        return list(filter(member_filter, members))
+        # the members of each role are known from the inverted index of MemberIndex, the filter
+        # is a single operation on the masks
+        # the selectivity is estimated from the number of members of the roles
+        size = index.size or 1
+        if requires == "has-no-roles":
+            return Step(
+                requires,
+                lambda x: index.where(lambda y: not y, index.role_counts, x),
+                selectivity=0.5,
+            )
+        if requires == "above" or requires == "below":
+            role = roles[0]
+            higher = index.higher_roles(role)
+            selectivity = min(sum(index.role_count(x) for x in higher) / size, 1)
+            if requires == "above":
+                return Step(requires, lambda x: x & index.above(role), 0.1, selectivity)
+            return Step(requires, lambda x: x & index.below(role), 0.1, 1 - selectivity)
+        counts = [index.role_count(x) for x in roles]
+        if requires == "has-all-roles":
+            return Step(requires, lambda x: x & index.all_roles(roles), 0.1, min(counts) / size)
+        selectivity = min(sum(counts) / size, 1)
+        if requires == "has-none-roles":
+            return Step(requires, lambda x: x & ~index.any_role(roles), 0.1, 1 - selectivity)
+        # has-role, has-any-role
+        return Step(requires, lambda x: x & index.any_role(roles), 0.1, selectivity)
+
+    def _nroles(self, index: MemberIndex, number: int, condition: str) -> "Step":
+        # @everyone is not counted
+        if condition == "exactly":
+            member_filter = lambda x: x == number
+        elif condition == "more":
+            member_filter = lambda x: x > number
+        else:  # less
+            member_filter = lambda x: x < number
+        return Step(
+            f"{condition}-nroles", lambda x: index.where(member_filter, index.role_counts, x)
+        )
 
     async def _selection(self, members: list, _selection: list, requires: str):
         selection = []
@@ -415,25 +501,111 @@ class AdvancedMemberSelect:
         else:
             return list(set(members) - set(selection))
 
-    async def _unavailable_selection(self, _selection):
+    async def _read_attachment_ids(self, attachment: discord.Attachment) -> List[str]:
+        # the content type is guessed by Discord, it can be missing
+        content_type = (attachment.content_type or "").split(";")[0].strip()
+        if content_type:
+            is_text = content_type == "text/plain"
+        else:
+            is_text = attachment.filename.lower().endswith(".txt")
+        if not is_text:
+            raise BadArgument(
+                _("The file `{name}` is not a text file, only `.txt` files are read.").format(
+                    name=attachment.filename
+                )
+            )
+        too_big = BadArgument(
+            _("The file `{name}` is too big, the limit is {limit} kB.").format(
+                name=attachment.filename, limit=self.HACKBAN_FILE_LIMIT // 1000
+            )
+        )
+        if attachment.size > self.HACKBAN_FILE_LIMIT:
+            raise too_big
+        # downloaded with the HTTP session of the bot, the size is bounded by the check above
+        try:
+            content = await attachment.read()
+        except discord.HTTPException as e:
+            raise BadArgument(
+                _("Failed to download the file `{name}`.").format(name=attachment.filename)
+            ) from e
+        if len(content) > self.HACKBAN_FILE_LIMIT:
+            raise too_big
+        return [x.decode() for x in file_id_pattern.findall(content)]
+
+    async def _unavailable_selection(self, _selection: List[str], fetch: bool = True):
         # don't question my function names
-        selection = []
-        for member in _selection:
-            try:
-                selection.append(await UnavailableMember.convert(self.ctx, member))
-            except BadArgument as e:
-                raise BadArgument(
-                    _(
-                        "Can't convert `{arg}` from `--hackban-select` into a valid user "
-                        "object. __You can only provide a user ID.__"
-                    ).format(arg=member)
-                ) from e
+        guild = self.ctx.guild
+        cache = self.ctx.cog.cache
+        results = {}  # text > member, duplicates are only resolved once
+        queries = {}  # ID > texts, members to look for
+        lookups = []  # texts which are not IDs
+        for text in dict.fromkeys(_selection):
+            match = user_id_pattern.match(text)
+            if not match:
+                lookups.append(text)
+                continue
+            user_id = int(match.group(1))
+            member = guild.get_member(user_id)
+            if member:
+                results[text] = member
+            elif not fetch or cache.is_non_member(guild, user_id):
+                # trust the raw ID
+                results[text] = UnavailableMember(self.ctx.bot, self.ctx._state, user_id)
+            else:
+                queries.setdefault(user_id, []).append(text)
+        limit = asyncio.Semaphore(self.HACKBAN_CONCURRENCY)
 
+        async def query(user_ids: List[int]):
+            async with limit:
+                try:
+                    found = await guild.query_members(
+                        user_ids=user_ids, limit=len(user_ids), cache=True
+                    )
+                except (discord.ClientException, asyncio.TimeoutError):
+                    # members intent disabled or Discord too slow, trust the raw IDs
+                    found = []
+                    fetched = False
+                else:
+                    fetched = True
+            found = {x.id: x for x in found}
+            for user_id in user_ids:
+                member = found.get(user_id)
+                if member is None:
+                    member = UnavailableMember(self.ctx.bot, self.ctx._state, user_id)
+                    if fetched:
+                        cache.add_non_member(guild, user_id)
+                for text in queries[user_id]:
+                    results[text] = member
+
+        async def lookup(text: str):
+            async with limit:
+                try:
+                    results[text] = await UnavailableMember.convert(self.ctx, text)
+                except BadArgument as e:
+                    raise BadArgument(
+                        _(
+                            "Can't convert `{arg}` from `--hackban-select` into a valid user "
+                            "object. __You can only provide a user ID.__"
+                        ).format(arg=text)
+                    ) from e
+
+        user_ids = list(queries)
+        size = self.HACKBAN_QUERY_SIZE
+        await asyncio.gather(
+            *(query(user_ids[i : i + size]) for i in range(0, len(user_ids), size)),
+            *(lookup(x) for x in lookups),
+        )
+        selection = []
+        seen = set()
+        for text in dict.fromkeys(_selection):
+            member = results[text]
+            if member.id not in seen:
+                seen.add(member.id)
+                selection.append(member)
         return selection
 
     async def convert(self, ctx, arguments):
         self.ctx = ctx
-        self._non_lurker_members = None
         async with ctx.typing():
             args = self.parse_arguments(arguments)
             self.reason = " ".join(args.reason or "")
@@ -453,6 +625,8 @@ class AdvancedMemberSelect:
             self.send_dm = args.send_dm
             self.send_modlog = args.send_modlog
             self.confirm = args.confirm
+            # search plan to send instead of performing the warn, if --explain was given
+            self.explain = None
             self.members, self.unavailable_members = await self.process_arguments(args)
             return self
 
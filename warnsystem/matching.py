@@ -0,0 +1,573 @@
+import asyncio
+import os
+import random
+import re
+import logging
+import signal
+import time
+
+from collections import namedtuple
+from multiprocessing.pool import Pool
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+log = logging.getLogger("red.laggron.warnsystem")
+
+# global inline flags at the start of a pattern, like (?i), not allowed in the middle of a pattern
+GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+# backreferences and conditionals use group numbers or names, which change once combined
+GROUP_REFERENCES = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+SCOPED_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+# shorter literals are found in almost every message, not worth indexing
+MIN_LITERAL_LENGTH = 3
+REPEATS = tuple(
+    getattr(sre_parse, x)
+    for x in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_parse, x)
+)
+
+
+def _can_combine(pattern: re.Pattern) -> bool:
+    return not pattern.groupindex and not GROUP_REFERENCES.search(pattern.pattern)
+
+
+def _scope_flags(pattern: re.Pattern) -> str:
+    """
+    Return the pattern with its global flags turned into a scoped group, so it can be placed
+    in the middle of another pattern.
+    """
+    text = pattern.pattern
+    while True:
+        match = GLOBAL_FLAGS.match(text)
+        if match is None:
+            break
+        text = text[match.end() :]
+    flags = "".join(letter for flag, letter in SCOPED_FLAGS if pattern.flags & flag)
+    if pattern.flags & re.ASCII:
+        flags = "a" + flags
+    if not flags:
+        return text
+    # with the verbose flag, a comment could hide the closing parenthesis
+    return f"(?{flags}:{text}\n)" if "x" in flags else f"(?{flags}:{text})"
+
+
+class RegexMatcher:
+    """
+    Check all the automod regex of a guild against a message with a single scan.
+
+    The patterns are combined into an alternation of lookaheads, one named group per pattern,
+    so the position where a pattern matches is tested but not consumed. If nothing matches,
+    we know no pattern matches anywhere in the text.
+
+    Patterns using named groups or references to groups can't be combined and are searched
+    separately.
+
+    The process pool builds its own copy from :meth:`definition`, and keeps it as long as the
+    key is the same. The key must change if the patterns change.
+    """
+
+    def __init__(self, patterns: Dict[str, re.Pattern], key: Optional[Hashable] = None):
+        self.patterns = patterns
+        self.key = key if key is not None else ("single", *self.definition().items())
+        self.groups = {}  # group name > trigger name
+        self.standalone = []
+        parts = []
+        for i, (name, pattern) in enumerate(patterns.items()):
+            if not _can_combine(pattern):
+                self.standalone.append(name)
+                continue
+            group = f"t{i}"
+            parts.append(f"(?=(?P<{group}>{_scope_flags(pattern)}))")
+            self.groups[group] = name
+        self.combined = None
+        if parts:
+            try:
+                self.combined = re.compile("|".join(parts))
+            except re.error:
+                log.warning(
+                    "Automod: failed to combine the regex patterns, they will be searched "
+                    "separately.",
+                    exc_info=True,
+                )
+                self.groups = {}
+                self.standalone = list(patterns)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def definition(self) -> Dict[str, Tuple[str, int]]:
+        return {name: (x.pattern, x.flags) for name, x in self.patterns.items()}
+
+    def profile(self, content: str) -> Dict[str, float]:
+        """
+        Return the time taken by each pattern to search the content on its own.
+        """
+        timings = {}
+        for name, pattern in self.patterns.items():
+            start = time.perf_counter()
+            pattern.search(content)
+            timings[name] = time.perf_counter() - start
+        return timings
+
+    def find(self, content: str) -> List[str]:
+        """
+        Return the names of the patterns matching the content, in the same order as given.
+        """
+        found = set()
+        if self.combined is not None:
+            for match in self.combined.finditer(content):
+                group = match.lastgroup
+                if group not in self.groups:
+                    group = next(x for x, y in match.groupdict().items() if y is not None)
+                found.add(self.groups[group])
+            if found:
+                # a pattern matching at the same position as a previous one in the alternation
+                # is hidden, only the first one is reported, so we check the others
+                for name in self.groups.values():
+                    if name not in found and self.patterns[name].search(content):
+                        found.add(name)
+        for name in self.standalone:
+            if self.patterns[name].search(content):
+                found.add(name)
+        return [x for x in self.patterns if x in found]
+
+
+def _literal_char(code: int) -> Optional[str]:
+    # Only ASCII characters are kept, their case folding is a single character, which keeps the
+    # literals contiguous in the case folded text. "i" is excluded because, with the ignore case
+    # flag, it also matches the turkish "İ", which folds to two characters.
+    if code >= 128:
+        return None
+    char = chr(code).casefold()
+    return None if char == "i" else char
+
+
+def _required_literals(items: Iterable) -> Optional[FrozenSet[str]]:
+    # returns a set of strings, one of them is in every match, or None if we can't tell
+    candidates = []
+    run = []
+
+    def end_run():
+        if run:
+            candidates.append(frozenset(("".join(run),)))
+            run.clear()
+
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            char = _literal_char(av)
+            if char is not None:
+                run.append(char)
+                continue
+        elif op == sre_parse.AT:
+            continue  # anchors don't consume anything, the literal goes on
+        end_run()
+        required = None
+        if op == sre_parse.SUBPATTERN:
+            required = _required_literals(av[-1])
+        elif op in REPEATS and av[0] >= 1:
+            required = _required_literals(av[2])
+        elif op == getattr(sre_parse, "ATOMIC_GROUP", None):
+            required = _required_literals(av)
+        elif op == sre_parse.BRANCH:
+            branches = [_required_literals(x) for x in av[1]]
+            if None not in branches:
+                required = frozenset().union(*branches)
+        if required:
+            candidates.append(required)
+    end_run()
+    candidates = [x for x in candidates if min(map(len, x)) >= MIN_LITERAL_LENGTH]
+    if not candidates:
+        return None
+    # the longer the shortest literal is, the less messages will contain one
+    return max(candidates, key=lambda x: min(map(len, x)))
+
+
+def required_literals(pattern: re.Pattern) -> Optional[FrozenSet[str]]:
+    """
+    Return case folded strings, one of them being in the case folded text of every match of
+    the pattern. :py:obj:`None` is returned if no such set can be found.
+    """
+    try:
+        return _required_literals(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return None
+
+
+class LiteralIndex:
+    """
+    Aho-Corasick automaton, finds which of many strings are in a text with a single pass.
+
+    Each string is associated to a set of values, :meth:`find` returns the values of all the
+    strings found.
+    """
+
+    def __init__(self, strings: Dict[str, Set]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for string, values in strings.items():
+            state = 0
+            for char in string:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                state = next_state
+            self.output[state].update(values)
+        # breadth-first, the failure link of a state is always built before its children
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(char, 0)
+                self.fail[next_state] = fail
+                self.output[next_state] |= self.output[fail]
+
+    def __bool__(self):
+        return len(self.goto) > 1 or bool(self.output[0])
+
+    def contains(self, text: str) -> bool:
+        """
+        Tell if any of the strings is in the text, stopping at the first one found.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        if output[0]:
+            return True  # empty string
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+    def find(self, text: str) -> set:
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class RegexIndex:
+    """
+    Prefilter for the automod regex of a guild.
+
+    The literals required by each pattern are indexed, a message can only trigger the
+    patterns of the literals it contains, and the patterns without literals. Most messages
+    contain none of them and don't need a regex search at all.
+    """
+
+    # number of combinations of patterns kept combined
+    MAX_MATCHERS = 32
+
+    def __init__(self, patterns: Dict[str, re.Pattern], key: Hashable):
+        self.patterns = patterns
+        self.key = key  # must be unique to this set of patterns, see RegexMatcher
+        self.ungated = set()
+        literals = {}
+        for name, pattern in patterns.items():
+            required = required_literals(pattern)
+            if required is None:
+                self.ungated.add(name)
+                continue
+            for literal in required:
+                literals.setdefault(literal, set()).add(name)
+        self.literals = LiteralIndex(literals)
+        self.matchers = {}  # frozenset of names > RegexMatcher
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def get_candidates(self, content: str) -> Set[str]:
+        """
+        Return the names of the patterns that may match the content.
+        """
+        names = self.literals.find(content.casefold()) if self.literals else set()
+        return names | self.ungated
+
+    def get_matcher(self, names: Iterable[str]) -> Optional[RegexMatcher]:
+        """
+        Return a matcher combining the given patterns, or :py:obj:`None` if there are none.
+        """
+        key = frozenset(names)
+        if not key:
+            return None
+        matcher = self.matchers.get(key)
+        if matcher is None:
+            if len(self.matchers) >= self.MAX_MATCHERS:
+                del self.matchers[next(iter(self.matchers))]
+            matcher = RegexMatcher(
+                {x: y for x, y in self.patterns.items() if x in key}, (*self.key, key)
+            )
+            self.matchers[key] = matcher
+        return matcher
+
+
+# matchers built by this process when running in the pool, see RegexDispatcher
+_registry = {}
+REGISTRY_SIZE = 256
+# a search slower than this is profiled, to find which pattern is expensive
+PROFILE_THRESHOLD = 0.005
+# share of the other searches profiled, to know the usual cost of the patterns
+PROFILE_RATE = 0.01
+
+# found: names of the patterns matching
+# duration: time taken by the search, in seconds
+# timings: time taken by each pattern if they were profiled, else None
+SearchResult = namedtuple("SearchResult", ("found", "duration", "timings"))
+
+
+def lower_priority():
+    """
+    Initializer of the pool for slow patterns, so its processes don't compete with the others.
+    """
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass  # not available on this platform
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise SearchTimeout
+
+
+def _with_deadline(timeout: Optional[float], function, *args):
+    # The regex engine checks for signals while searching, so an alarm can stop a pattern
+    # stuck in catastrophic backtracking. Returns None if the function was stopped.
+    if timeout is None:
+        return function(*args)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            return function(*args)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except SearchTimeout:
+        return None
+
+
+def search_batch(
+    definitions: Dict[Hashable, Dict[str, Tuple[str, int]]],
+    jobs: List[Tuple[Hashable, str]],
+    timeout: Optional[float] = None,
+) -> List[Optional[SearchResult]]:
+    """
+    Run a batch of searches, this is the function executed in the process pool.
+
+    Each job is the key of a matcher and the content to search. The matchers are kept by the
+    process, their definition is only needed the first time. :py:obj:`None` is returned for
+    the jobs of an unknown matcher.
+
+    Each search is stopped once it reaches the timeout, its duration then tells it was
+    stopped and its result is empty. On platforms without ``SIGALRM``, searches are not
+    stopped, but their duration is still measured.
+    """
+    if timeout is not None and hasattr(signal, "setitimer"):
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    else:
+        timeout = None
+    try:
+        return _search_batch(definitions, jobs, timeout)
+    finally:
+        if timeout is not None:
+            signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _search_batch(
+    definitions: Dict[Hashable, Dict[str, Tuple[str, int]]],
+    jobs: List[Tuple[Hashable, str]],
+    timeout: Optional[float],
+) -> List[Optional[SearchResult]]:
+    for key, definition in definitions.items():
+        patterns = {name: re.compile(*x) for name, x in definition.items()}
+        _registry.pop(key, None)
+        _registry[key] = RegexMatcher(patterns, key)
+        while len(_registry) > REGISTRY_SIZE:
+            del _registry[next(iter(_registry))]
+    results = []
+    for key, content in jobs:
+        matcher = _registry.get(key)
+        if matcher is None:
+            results.append(None)
+            continue
+        start = time.perf_counter()
+        found = _with_deadline(timeout, matcher.find, content)
+        duration = time.perf_counter() - start
+        if found is None:
+            results.append(SearchResult([], duration, None))
+            continue
+        timings = None
+        if len(matcher) == 1:
+            timings = {next(iter(matcher.patterns)): duration}
+        elif duration >= PROFILE_THRESHOLD or random.random() < PROFILE_RATE:
+            timings = _with_deadline(timeout, matcher.profile, content)
+        results.append(SearchResult(found, duration, timings))
+    return results
+
+
+class RegexDispatcher:
+    """
+    Group the regex searches sent to the process pool.
+
+    The searches requested within a few milliseconds are sent together in a single call to the
+    pool, with the keys of the matchers instead of the patterns. The results come back through
+    the pool's callbacks, so no thread is waiting for them.
+
+    A search that isn't batched is sent alone right away, this is used to find the pattern
+    causing a timeout without blaming the others.
+
+    Each search is stopped by the process once it reaches the timeout. A batch must answer
+    within the timeout of each of its searches, plus one for the job the process may be
+    running already, capped at ``max_deadline`` (but never under twice the timeout), else its
+    searches raise :py:exc:`asyncio.TimeoutError`. This deadline includes the time spent in
+    the queue of the pool, it doesn't tell which pattern is slow.
+
+    Searches are stopped in the process with ``SIGALRM``. Without it (on Windows), a search
+    is never stopped, this deadline is then the only protection against a stuck process.
+
+    With ``recycle``, the pool is replaced by a new one when a batch misses its deadline, as
+    its processes may be stuck. The searches still running in the old pool are lost.
+    """
+
+    def __init__(
+        self,
+        pool_factory: Callable[[], Pool],
+        timeout: float,
+        delay: float = 0.005,
+        max_batch_size: int = 50,
+        recycle: bool = False,
+        max_deadline: float = 5,
+    ):
+        self.pool_factory = pool_factory
+        self.pool = pool_factory()
+        self.recycled = 0
+        self.recycle = recycle
+        self.timeout = timeout
+        self.delay = delay
+        self.max_batch_size = max_batch_size
+        self.max_deadline = max_deadline
+        self.queue = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def search(
+        self, matcher: RegexMatcher, content: str, batch: bool = True
+    ) -> SearchResult:
+        """
+        Search the content, the result gives the names of the patterns matching.
+
+        If the duration of the result reaches the timeout, the search was stopped by the
+        process and the result is incomplete.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            No result was received before the deadline of the batch.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if batch:
+            self.queue.append((matcher, content, future))
+            if len(self.queue) >= self.max_batch_size:
+                self.flush()
+            elif self.flush_handle is None:
+                self.flush_handle = loop.call_later(self.delay, self.flush)
+        else:
+            self._send(loop, [(matcher, content, future)])
+        return await future
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.queue = self.queue, []
+        if batch:
+            self._send(asyncio.get_running_loop(), batch)
+
+    def recycle_pool(self):
+        """
+        Replace the pool by a new one, the old one is terminated in a thread.
+        """
+        old_pool, self.pool = self.pool, self.pool_factory()
+        self.recycled += 1
+        asyncio.get_running_loop().run_in_executor(None, old_pool.terminate)
+
+    def _send(self, loop: asyncio.AbstractEventLoop, batch: list, definitions: bool = False):
+        # Only the keys of the matchers are sent at first. The process that receives the batch
+        # may not know some of them (each process of the pool has its own matchers), those
+        # jobs are sent again with the definitions.
+        matchers = {}
+        jobs = []
+        for matcher, content, future in batch:
+            matchers.setdefault(matcher.key, matcher)
+            jobs.append((matcher.key, content))
+
+        pool = self.pool
+
+        def expire():
+            expired = False
+            for matcher, content, future in batch:
+                if not future.done():
+                    future.set_exception(asyncio.TimeoutError())
+                    expired = True
+            # the batches lost with an old pool don't replace the new one
+            if expired and self.recycle and pool is self.pool:
+                log.warning("Automod: the regex process is not answering, replacing it.")
+                self.recycle_pool()
+
+        delay = min(self.timeout * (len(batch) + 1), max(self.max_deadline, self.timeout * 2))
+        deadline = loop.call_later(delay, expire)
+
+        def set_results(results):
+            deadline.cancel()
+            missed = []
+            for job, result in zip(batch, results):
+                future = job[2]
+                if future.done():
+                    continue
+                if result is not None:
+                    future.set_result(result)
+                elif definitions:
+                    future.set_exception(RuntimeError("The regex process lost the matcher."))
+                else:
+                    missed.append(job)
+            if missed:
+                self._send(loop, missed, definitions=True)
+
+        def set_exception(exception):
+            deadline.cancel()
+            for matcher, content, future in batch:
+                if not future.done():
+                    future.set_exception(exception)
+
+        # the callbacks are called from a thread of the pool
+        pool.apply_async(
+            search_batch,
+            (
+                {x: y.definition() for x, y in matchers.items()} if definitions else {},
+                jobs,
+                self.timeout,
+            ),
+            callback=lambda x: loop.call_soon_threadsafe(set_results, x),
+            error_callback=lambda x: loop.call_soon_threadsafe(set_exception, x),
+        )
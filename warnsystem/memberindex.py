@@ -0,0 +1,203 @@
+import heapq
+
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import cached_property
+from itertools import compress
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import discord
+
+NAN = float("nan")
+
+
+class LazyColumn:
+    """
+    Column whose values are only computed for the members read, for the attributes that are
+    expensive to get. Once computed, a value is kept.
+    """
+
+    __slots__ = ("members", "function", "values")
+
+    def __init__(self, members: List[discord.Member], function: Callable):
+        self.members = members
+        self.function = function
+        self.values = [None] * len(members)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i: int):
+        value = self.values[i]
+        if value is None:
+            value = self.values[i] = self.function(self.members[i])
+        return value
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self.values)))
+
+
+class MemberIndex:
+    """
+    Columnar snapshot of the members of a guild, used by
+    :class:`~warnsystem.converters.AdvancedMemberSelect`.
+
+    Each attribute needed by a search is read once for all members and stored in a column. A
+    filter returns a mask of the members matching: an :py:class:`int` where each member is a
+    byte, set to 1 if it matches. Masks are combined with bitwise operations, and the list of
+    members is only built once at the end with :meth:`select`.
+
+    Columns are built on first use, a search only reads what it needs.
+    """
+
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
+        self.members: List[discord.Member] = guild.members
+        self.size = len(self.members)
+        self.all = self.mask([True] * self.size)
+        self._role_masks = {}  # role ID > mask, see role_mask
+
+    def mask(self, flags: Iterable) -> int:
+        """
+        Build a mask from the truth value of each member, in the order of :attr:`members`.
+        """
+        return int.from_bytes(bytes(map(bool, flags)), "little")
+
+    def mask_of(self, indexes: Iterable[int]) -> int:
+        flags = bytearray(self.size)
+        for i in indexes:
+            flags[i] = 1
+        return int.from_bytes(flags, "little")
+
+    def where(self, predicate: Callable, column: Sequence, mask: Optional[int] = None) -> int:
+        """
+        Return the mask of the members whose value in the column matches the predicate.
+
+        If a mask is given, only those members are checked, the others never match.
+        """
+        if mask is None or mask == self.all:
+            return self.mask(map(predicate, column))
+        return self.mask_of(i for i in self.indexes(mask) if predicate(column[i]))
+
+    def count(self, mask: int) -> int:
+        return mask.to_bytes(self.size, "little").count(1)
+
+    def indexes(self, mask: int) -> List[int]:
+        return list(compress(range(self.size), mask.to_bytes(self.size, "little")))
+
+    def select(self, mask: int) -> List[discord.Member]:
+        return list(compress(self.members, mask.to_bytes(self.size, "little")))
+
+    @cached_property
+    def joined_at(self) -> array:
+        # join timestamps, NaN for the members without a join date (lurkers)
+        # NaN is never lower or greater than a date, those members never match a join filter
+        return array("d", (x.joined_at.timestamp() if x.joined_at else NAN for x in self.members))
+
+    @cached_property
+    def joined(self) -> int:
+        # members with a join date
+        return self.where(lambda x: x == x, self.joined_at)
+
+    @cached_property
+    def bots(self) -> int:
+        return self.mask(x.bot for x in self.members)
+
+    @cached_property
+    def permissions(self) -> LazyColumn:
+        # computed from the roles of each member, only done for the members checked
+        return LazyColumn(self.members, lambda x: x.guild_permissions.value)
+
+    @cached_property
+    def _role_index(self) -> Tuple[Dict[int, List[int]], array]:
+        # inverted index, role ID > indexes of the members with that role (except @everyone)
+        # and the number of roles of each member, built in a single pass
+        # the masks are only built for the roles searched
+        role_members = {x.id: [] for x in self.guild.roles}
+        role_counts = array("H")
+        for i, member in enumerate(self.members):
+            roles = member._roles  # IDs, cheaper than building the Role objects
+            role_counts.append(len(roles))
+            for role_id in roles:
+                try:
+                    role_members[role_id].append(i)
+                except KeyError:
+                    pass  # role deleted in the meantime
+        return role_members, role_counts
+
+    @property
+    def role_members(self) -> Dict[int, List[int]]:
+        return self._role_index[0]
+
+    @property
+    def role_counts(self) -> array:
+        # @everyone is not counted
+        return self._role_index[1]
+
+    @cached_property
+    def role_keys(self) -> list:
+        # guild.roles is sorted like the hierarchy, from @everyone to the top role
+        return [(x.position, x.id) for x in self.guild.roles]
+
+    def role_mask(self, role: discord.Role) -> int:
+        if role.is_default():
+            return self.all
+        mask = self._role_masks.get(role.id)
+        if mask is None:
+            mask = self._role_masks[role.id] = self.mask_of(self.role_members.get(role.id, ()))
+        return mask
+
+    def role_count(self, role: discord.Role) -> int:
+        if role.is_default():
+            return self.size
+        return len(self.role_members.get(role.id, ()))
+
+    def any_role(self, roles: Iterable[discord.Role]) -> int:
+        mask = 0
+        for role in roles:
+            mask |= self.role_mask(role)
+        return mask
+
+    def all_roles(self, roles: Iterable[discord.Role]) -> int:
+        mask = self.all
+        for role in roles:
+            mask &= self.role_mask(role)
+        return mask
+
+    def higher_roles(self, role: discord.Role, inclusive: bool = False) -> List[discord.Role]:
+        """
+        Return the roles placed above the given one (or at the same level if inclusive).
+        """
+        if inclusive:
+            start = bisect_left(self.role_keys, (role.position, 0))
+        else:
+            start = bisect_right(self.role_keys, (role.position, float("inf")))
+        return self.guild.roles[start:]
+
+    def above(self, role: discord.Role) -> int:
+        """
+        Return the mask of the members whose top role is above the given role.
+        """
+        # a member is above if they have any of the roles placed higher
+        return self.any_role(self.higher_roles(role))
+
+    def below(self, role: discord.Role) -> int:
+        """
+        Return the mask of the members whose top role is below the given role.
+        """
+        # a member is below if they have none of the roles placed at the same level or higher
+        return self.all ^ self.any_role(self.higher_roles(role, inclusive=True))
+
+    def last_joins(self, mask: int, number: int) -> int:
+        """
+        Keep the given number of members who joined last among the mask.
+        """
+        indexes = self.indexes(mask & self.joined)
+        return self.mask_of(heapq.nlargest(number, indexes, key=self.joined_at.__getitem__))
+
+    def first_joins(self, mask: int, number: int) -> int:
+        """
+        Keep the given number of members who joined first among the mask.
+        """
+        indexes = self.indexes(mask & self.joined)
+        return self.mask_of(heapq.nsmallest(number, indexes, key=self.joined_at.__getitem__))
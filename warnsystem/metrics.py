@@ -0,0 +1,72 @@
+import statistics
+
+from bisect import bisect_left
+from collections import deque
+from typing import Optional
+
+# upper bounds of the buckets, in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, float("inf"))
+
+
+def format_duration(seconds: float) -> str:
+    if seconds == float("inf"):
+        return "inf"
+    if seconds < 0.001:
+        return f"{seconds * 1000000:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+class LatencyHistogram:
+    """
+    Distribution of durations in fixed buckets, using constant memory.
+
+    The last samples are also kept to tell the current trend, the buckets cover the entire
+    lifetime.
+
+    ``pattern`` is the regex measured, if any, so the statistics can be dropped once it is
+    edited.
+    """
+
+    def __init__(self, recent_size: int = 50, pattern: Optional[str] = None):
+        self.pattern = pattern
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=recent_size)
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Return the upper bound of the bucket containing the given percentile.
+        """
+        rank = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bound, self.max)
+        return 0.0
+
+    def recent_median(self) -> float:
+        return statistics.median(self.recent) if self.recent else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"n={self.count} mean={format_duration(self.mean)} "
+            f"p50={format_duration(self.percentile(50))} "
+            f"p90={format_duration(self.percentile(90))} "
+            f"p99={format_duration(self.percentile(99))} max={format_duration(self.max)}"
+        )
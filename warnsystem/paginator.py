@@ -0,0 +1,124 @@
+import asyncio
+import discord
+
+from typing import Callable, Sequence, Union
+
+from redbot.core import commands
+from redbot.core.utils.menus import close_menu, start_adding_reactions
+from redbot.core.utils.predicates import ReactionPredicate
+
+Page = Union[str, discord.Embed]
+
+
+class LazyPages(Sequence):
+    """
+    A sequence of pages rendered on demand, then kept.
+
+    The menu only asks for the page being shown, so the time needed to display the first page
+    doesn't depend on the number of pages.
+    """
+
+    def __init__(self, length: int, render: Callable[[int], Page]):
+        self.length = length
+        self.render = render
+        self.pages = {}
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index: int) -> Page:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("Page index out of range.")
+        try:
+            return self.pages[index]
+        except KeyError:
+            pass
+        page = self.render(index)
+        self.pages[index] = page
+        return page
+
+
+async def menu(
+    ctx: commands.Context,
+    pages: Sequence[Page],
+    controls: dict,
+    message: discord.Message = None,
+    page: int = 0,
+    timeout: float = 30.0,
+):
+    """
+    Same as :func:`redbot.core.utils.menus.menu`, with controls taking the same arguments.
+
+    Red's menu checks the type of every page each time it's called (so on each page turn),
+    which would render all the pages of a :class:`LazyPages` object. This one only touches the
+    page displayed.
+    """
+    current_page = pages[page]
+    if not message:
+        if isinstance(current_page, discord.Embed):
+            message = await ctx.send(embed=current_page)
+        else:
+            message = await ctx.send(current_page)
+        # don't wait for it to complete, the user can already react
+        start_adding_reactions(message, controls.keys())
+    else:
+        try:
+            if isinstance(current_page, discord.Embed):
+                await message.edit(embed=current_page)
+            else:
+                await message.edit(content=current_page)
+        except discord.errors.NotFound:
+            return
+    pred = ReactionPredicate.with_emojis(tuple(controls.keys()), message, ctx.author)
+    tasks = [
+        asyncio.ensure_future(ctx.bot.wait_for("reaction_add", check=pred)),
+        asyncio.ensure_future(ctx.bot.wait_for("reaction_remove", check=pred)),
+    ]
+    done, pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    if not done:
+        try:
+            if message.channel.permissions_for(ctx.me).manage_messages:
+                await message.clear_reactions()
+            else:
+                for key in controls.keys():
+                    await message.remove_reaction(key, ctx.bot.user)
+        except discord.errors.HTTPException:
+            pass
+        return
+    reaction, user = done.pop().result()
+    return await controls[reaction.emoji](
+        ctx, pages, controls, message, page, timeout, reaction.emoji
+    )
+
+
+async def next_page(
+    ctx: commands.Context,
+    pages: Sequence[Page],
+    controls: dict,
+    message: discord.Message,
+    page: int,
+    timeout: float,
+    emoji: str,
+):
+    page = 0 if page == len(pages) - 1 else page + 1
+    return await menu(ctx, pages, controls, message=message, page=page, timeout=timeout)
+
+
+async def prev_page(
+    ctx: commands.Context,
+    pages: Sequence[Page],
+    controls: dict,
+    message: discord.Message,
+    page: int,
+    timeout: float,
+    emoji: str,
+):
+    page = len(pages) - 1 if page == 0 else page - 1
+    return await menu(ctx, pages, controls, message=message, page=page, timeout=timeout)
+
+
+DEFAULT_CONTROLS = {"⬅": prev_page, "❌": close_menu, "➡": next_page}
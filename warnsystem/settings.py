@@ -61,11 +61,13 @@ class SettingsMixin(MixinMeta):
             )
         elif enable:
             await self.data.guild(guild).update_mute.set(True)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(
                 _("Done. New created channels will be updated to keep the mute role working.")
             )
         else:
             await self.data.guild(guild).update_mute.set(False)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(
                 _(
                     "Done. New created channels won't be updated.\n**Make sure to update "
@@ -124,8 +126,10 @@ class SettingsMixin(MixinMeta):
             return
         if ban_type == "softban":
             await self.data.guild(guild).bandays.softban.set(days)
+            self.cache.invalidate_guild_settings(guild)
         else:
             await self.data.guild(guild).bandays.ban.set(days)
+            self.cache.invalidate_guild_settings(guild)
         await ctx.send(_("The new value was successfully set!"))
 
     @warnset.command(name="channel")
@@ -151,6 +155,7 @@ class SettingsMixin(MixinMeta):
         else:
             if not level:
                 await self.data.guild(guild).channels.main.set(channel.id)
+                self.cache.invalidate_guild_settings(guild)
                 await ctx.send(
                     _(
                         "Done. All events will be send to that channel by default.\n\nIf you want "
@@ -168,6 +173,7 @@ class SettingsMixin(MixinMeta):
                 )
             else:
                 await self.data.guild(guild).channels.set_raw(level, value=channel.id)
+                self.cache.invalidate_guild_settings(guild)
                 await ctx.send(
                     _(
                         "Done. All level {level} warnings events will be sent to that channel."
@@ -189,6 +195,7 @@ class SettingsMixin(MixinMeta):
             await ctx.send(_("You must provide a level between 1 and 5."))
             return
         await self.data.guild(guild).colors.set_raw(str(level), value=color.value)
+        self.cache.invalidate_guild_settings(guild)
         await ctx.send(
             _(
                 "The new color for level {level} warnings has been succesfully set to {color}"
@@ -241,8 +248,7 @@ class SettingsMixin(MixinMeta):
                         }
                     )
                     total_cases += 1
-                async with self.data.custom("MODLOGS", guild.id, int(member)).x() as logs:
-                    logs.extend(cases)
+                self.store.append_many((guild.id, int(member), x) for x in cases)
             return total_cases
 
         guild = ctx.guild
@@ -321,9 +327,10 @@ class SettingsMixin(MixinMeta):
             total = await convert(content)
         elif pred.result == 1:
             await ctx.send(_("Deleting server logs... Settings, such as channels, are kept."))
-            await self.data.custom("MODLOGS").set({})
+            self.store.clear_guild(guild.id)
             await ctx.send(_("Starting conversion... This might take a long time."))
             total = await convert(content)
+        self.cache.clear_case_counts(guild)
         t2 = time.time()
         await ctx.send(
             _(
@@ -392,6 +399,7 @@ class SettingsMixin(MixinMeta):
         await self.data.guild(guild).set_raw(
             "embed_description_" + destination, str(level), value=description
         )
+        self.cache.invalidate_guild_settings(guild)
         await ctx.send(
             _("The new description for {destination} (warn {level}) was successfully set!").format(
                 destination=_("modlog") if destination == "modlog" else _("user"), level=level
@@ -424,9 +432,11 @@ save it, as if it was performed with WarnSystem. **However, the member will not
             )
         elif enable:
             await self.data.guild(guild).log_manual.set(True)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(_("Done. The bot will now listen for manual actions and log them."))
         else:
             await self.data.guild(guild).log_manual.set(False)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(_("Done. The bot won't listen for manual actions anymore."))
 
     @warnset.command(name="hierarchy")
@@ -454,6 +464,7 @@ save it, as if it was performed with WarnSystem. **However, the member will not
             )
         elif enable:
             await self.data.guild(guild).respect_hierarchy.set(True)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(
                 _(
                     "Done. Moderators will not be able to take actions on the members higher "
@@ -462,6 +473,7 @@ save it, as if it was performed with WarnSystem. **However, the member will not
             )
         else:
             await self.data.guild(guild).respect_hierarchy.set(False)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(
                 _(
                     "Done. Moderators will be able to take actions on anyone on the server, as "
@@ -652,6 +664,7 @@ channels, and prevented from talking in all voice channels.
             )
         elif enable:
             await self.data.guild(guild).reinvite.set(True)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(
                 _(
                     "Done. The bot will try to send an invite to unbanned members. Please note "
@@ -661,6 +674,7 @@ channels, and prevented from talking in all voice channels.
             )
         else:
             await self.data.guild(guild).reinvite.set(False)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(_("Done. The bot will no longer reinvite unbanned members."))
 
     @warnset.command("removeroles")
@@ -686,6 +700,7 @@ channels, and prevented from talking in all voice channels.
             )
         elif enable:
             await self.data.guild(guild).remove_roles.set(True)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(
                 _(
                     "Done. All roles will be removed from muted members. They will get their "
@@ -695,6 +710,7 @@ channels, and prevented from talking in all voice channels.
             )
         else:
             await self.data.guild(guild).remove_roles.set(False)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(_("Done. Muted members will keep their roles on mute."))
 
     @warnset.command(name="settings")
@@ -851,6 +867,7 @@ channels, and prevented from talking in all voice channels.
             )
         elif enable:
             await self.data.guild(guild).show_mod.set(True)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(
                 _(
                     "Done. The moderator responsible of a warn will now be shown to the warned "
@@ -859,6 +876,7 @@ channels, and prevented from talking in all voice channels.
             )
         else:
             await self.data.guild(guild).show_mod.set(False)
+            self.cache.invalidate_guild_settings(guild)
             await ctx.send(_("Done. The bot will no longer show the responsible moderator."))
 
     @warnset.group(name="substitutions")
@@ -902,6 +920,7 @@ channels, and prevented from talking in all voice channels.
                 await ctx.send(_("That substitution is too long! Maximum is 600 characters!"))
                 return
             substitutions[name] = text
+        self.cache.invalidate_guild_settings(ctx.guild)
         await ctx.send(
             _(
                 "Your new subsitutions with the keyword `{keyword}` was successfully "
@@ -929,6 +948,7 @@ channels, and prevented from talking in all voice channels.
                 )
                 return
             del substitutions[name]
+        self.cache.invalidate_guild_settings(ctx.guild)
         await ctx.send(_("The substitutions was successfully deleted."))
 
     @warnset_substitutions.command(name="list")
@@ -972,6 +992,7 @@ channels, and prevented from talking in all voice channels.
             await ctx.send(_("You must provide a level between 1 and 5."))
             return
         await self.data.guild(guild).thumbnails.set_raw(str(level), value=url)
+        self.cache.invalidate_guild_settings(guild)
         await ctx.send(
             _("The new image for level {level} warnings has been set to {image}.").format(
                 level=level, image=url
@@ -0,0 +1,295 @@
+import json
+import logging
+import sqlite3
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+log = logging.getLogger("red.laggron.warnsystem")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    guild_id    INTEGER NOT NULL,
+    member_id   INTEGER NOT NULL,
+    case_no     INTEGER NOT NULL,
+    level       INTEGER NOT NULL,
+    time        INTEGER,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (guild_id, member_id, case_no)
+);
+CREATE INDEX IF NOT EXISTS cases_guild_time ON cases (guild_id, time);
+CREATE INDEX IF NOT EXISTS cases_member ON cases (member_id, guild_id, case_no);
+"""
+
+
+class CaseStore:
+    """
+    Storage for the modlogs of the members.
+
+    Cases used to be saved with Config, as one list per member that had to be fully read and
+    rewritten for every warn. They are now rows of a SQLite table keyed by guild, member and case
+    number, which gives append-only writes and direct access to a single case.
+
+    The case itself is saved as JSON with the same body as before, the level and the time are
+    duplicated in their own columns for counting and sorting.
+
+    All calls are synchronous, SQLite answers those queries faster than an executor round trip.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _next_case_number(self, guild_id: int, member_id: int) -> int:
+        cursor = self.conn.execute(
+            "SELECT MAX(case_no) FROM cases WHERE guild_id = ? AND member_id = ?",
+            (guild_id, member_id),
+        )
+        return (cursor.fetchone()[0] or 0) + 1
+
+    def _insert(self, guild_id: int, member_id: int, case_no: int, case: dict):
+        self.conn.execute(
+            "INSERT INTO cases (guild_id, member_id, case_no, level, time, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, member_id, case_no, case["level"], case["time"], json.dumps(case)),
+        )
+
+    def append(self, guild_id: int, member_id: int, case: dict) -> int:
+        """
+        Add a case at the end of a member's modlog and return its number.
+        """
+        guild_id, member_id = int(guild_id), int(member_id)
+        with self.conn:
+            case_no = self._next_case_number(guild_id, member_id)
+            self._insert(guild_id, member_id, case_no, case)
+        return case_no
+
+    def append_many(self, cases: Iterable[Tuple[int, int, dict]]) -> int:
+        """
+        Add multiple ``(guild_id, member_id, case)`` entries within a single transaction.
+
+        Returns the number of cases added.
+        """
+        next_numbers = {}
+        total = 0
+        with self.conn:
+            for guild_id, member_id, case in cases:
+                key = (int(guild_id), int(member_id))
+                try:
+                    case_no = next_numbers[key]
+                except KeyError:
+                    case_no = self._next_case_number(*key)
+                self._insert(*key, case_no, case)
+                next_numbers[key] = case_no + 1
+                total += 1
+        return total
+
+    def get(self, guild_id: int, member_id: int, index: int) -> Optional[dict]:
+        """
+        Get a single case, index starts at 1. Returns :py:obj:`None` if it doesn't exist.
+        """
+        cursor = self.conn.execute(
+            "SELECT data FROM cases WHERE guild_id = ? AND member_id = ? AND case_no = ?",
+            (int(guild_id), int(member_id), index),
+        )
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all(
+        self,
+        guild_id: int,
+        member_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        newest_first: bool = False,
+    ) -> List[dict]:
+        """
+        Get the modlog of a member, sorted from the oldest to the newest case unless
+        ``newest_first`` is set. ``limit`` and ``offset`` apply after sorting.
+        """
+        cursor = self.conn.execute(
+            "SELECT data FROM cases WHERE guild_id = ? AND member_id = ? "
+            f"ORDER BY case_no {'DESC' if newest_first else 'ASC'} LIMIT ? OFFSET ?",
+            (int(guild_id), int(member_id), -1 if limit is None else limit, offset),
+        )
+        return [json.loads(x[0]) for x in cursor]
+
+    def get_guild(
+        self,
+        guild_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        newest_first: bool = False,
+    ) -> List[Tuple[int, dict]]:
+        """
+        Get the cases of a guild as ``(member_id, case)`` tuples, sorted from the oldest to the
+        newest case unless ``newest_first`` is set. ``limit`` and ``offset`` apply after sorting.
+
+        This walks the ``(guild_id, time)`` index, only the requested rows are read.
+        """
+        order = "DESC" if newest_first else "ASC"
+        cursor = self.conn.execute(
+            "SELECT member_id, data FROM cases WHERE guild_id = ? "
+            f"ORDER BY time {order}, rowid {order} LIMIT ? OFFSET ?",
+            (int(guild_id), -1 if limit is None else limit, offset),
+        )
+        return [(x[0], json.loads(x[1])) for x in cursor]
+
+    def count_guild(self, guild_id: int) -> int:
+        """
+        Get the total number of cases in a guild.
+        """
+        cursor = self.conn.execute(
+            "SELECT COUNT(*) FROM cases WHERE guild_id = ?", (int(guild_id),)
+        )
+        return cursor.fetchone()[0]
+
+    def get_user(self, member_id: int) -> Dict[int, List[dict]]:
+        """
+        Get the cases of a user in all guilds, as a dict of guild IDs associated to the modlogs.
+        """
+        cursor = self.conn.execute(
+            "SELECT guild_id, data FROM cases WHERE member_id = ? ORDER BY guild_id, case_no",
+            (int(member_id),),
+        )
+        cases = {}
+        for guild_id, data in cursor:
+            cases.setdefault(guild_id, []).append(json.loads(data))
+        return cases
+
+    def iter_user(self, member_id: int) -> Iterator[Tuple[int, dict]]:
+        """
+        Iterate over the cases of a user in all guilds, as tuples of guild ID and case, sorted by
+        guild and case number.
+
+        Only one row is loaded at a time, and only the guilds where the user has cases are read.
+        """
+        cursor = self.conn.execute(
+            "SELECT guild_id, data FROM cases WHERE member_id = ? ORDER BY guild_id, case_no",
+            (int(member_id),),
+        )
+        for guild_id, data in cursor:
+            yield guild_id, json.loads(data)
+
+    def user_guilds(self, member_id: int) -> List[int]:
+        """
+        Get the IDs of the guilds where a user has cases.
+        """
+        cursor = self.conn.execute(
+            "SELECT DISTINCT guild_id FROM cases WHERE member_id = ? ORDER BY guild_id",
+            (int(member_id),),
+        )
+        return [x[0] for x in cursor]
+
+    def count(self, guild_id: int, member_id: int) -> Dict[int, int]:
+        """
+        Get the number of cases of a member for each level.
+        """
+        cursor = self.conn.execute(
+            "SELECT level, COUNT(*) FROM cases WHERE guild_id = ? AND member_id = ? "
+            "GROUP BY level",
+            (int(guild_id), int(member_id)),
+        )
+        return dict(cursor.fetchall())
+
+    def edit(self, guild_id: int, member_id: int, index: int, case: dict) -> bool:
+        """
+        Replace an existing case. Returns :py:obj:`False` if it doesn't exist.
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE cases SET level = ?, time = ?, data = ? "
+                "WHERE guild_id = ? AND member_id = ? AND case_no = ?",
+                (
+                    case["level"],
+                    case["time"],
+                    json.dumps(case),
+                    int(guild_id),
+                    int(member_id),
+                    index,
+                ),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, guild_id: int, member_id: int, index: int) -> Optional[dict]:
+        """
+        Remove a case and return it. The following cases of the member are moved back by one.
+        """
+        guild_id, member_id = int(guild_id), int(member_id)
+        case = self.get(guild_id, member_id, index)
+        if case is None:
+            return None
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM cases WHERE guild_id = ? AND member_id = ? AND case_no = ?",
+                (guild_id, member_id, index),
+            )
+            # the primary key is checked for each row, we can't shift the numbers in place
+            # so the rows are first moved to negative numbers, then flipped back
+            self.conn.execute(
+                "UPDATE cases SET case_no = 1 - case_no "
+                "WHERE guild_id = ? AND member_id = ? AND case_no > ?",
+                (guild_id, member_id, index),
+            )
+            self.conn.execute(
+                "UPDATE cases SET case_no = -case_no "
+                "WHERE guild_id = ? AND member_id = ? AND case_no < 0",
+                (guild_id, member_id),
+            )
+        return case
+
+    def clear(self, guild_id: int, member_id: int):
+        """
+        Remove the entire modlog of a member.
+        """
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM cases WHERE guild_id = ? AND member_id = ?",
+                (int(guild_id), int(member_id)),
+            )
+
+    def clear_guild(self, guild_id: int):
+        """
+        Remove the modlogs of all members of a guild.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM cases WHERE guild_id = ?", (int(guild_id),))
+
+    def clear_user(self, member_id: int) -> List[int]:
+        """
+        Remove the modlogs of a user in all guilds.
+
+        Returns the IDs of the guilds where cases were removed.
+        """
+        guilds = self.user_guilds(member_id)
+        if guilds:
+            with self.conn:
+                self.conn.execute("DELETE FROM cases WHERE member_id = ?", (int(member_id),))
+        return guilds
+
+    def import_modlogs(self, modlogs: dict) -> int:
+        """
+        Replace the content of the store with modlogs saved in the old Config format:
+        ``{guild_id: {member_id: {"x": [case, ...]}}}``
+
+        Returns the number of cases imported.
+        """
+        total = 0
+        with self.conn:
+            self.conn.execute("DELETE FROM cases")
+            for guild_id, members in modlogs.items():
+                if not str(guild_id).isdigit():
+                    continue
+                for member_id, content in members.items():
+                    if not str(member_id).isdigit():
+                        continue
+                    for i, case in enumerate(content.get("x", []), start=1):
+                        self._insert(int(guild_id), int(member_id), i, case)
+                        total += 1
+        return total
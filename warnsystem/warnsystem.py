@@ -4,7 +4,9 @@ import logging
 import asyncio
 import re
 
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
+from itertools import groupby
+from operator import itemgetter
 from typing import Optional
 from asyncio import TimeoutError as AsyncTimeoutError
 from abc import ABC
@@ -13,16 +15,18 @@ from laggron_utils.logging import close_logger, DisabledConsoleOutput
 
 from redbot.core import commands, Config, checks
 from redbot.core.commands.converter import TimedeltaConverter
+from redbot.core.data_manager import cog_data_path
 from redbot.core.i18n import Translator, cog_i18n
 from redbot.core.utils import predicates, menus, mod
 from redbot.core.utils.chat_formatting import pagify
 
-from . import errors
+from . import errors, paginator
 from .api import API, UnavailableMember
 from .automod import AutomodMixin
 from .cache import MemoryCache
 from .converters import AdvancedMemberSelect
 from .settings import SettingsMixin
+from .store import CaseStore
 
 log = logging.getLogger("red.laggron.warnsystem")
 _ = Translator("WarnSystem", __file__)
@@ -108,6 +112,15 @@ except ImportError:
         return discord.File(file, filename, spoiler=spoiler)
 
 
+# core commands editing who is immune to the automod
+IMMUNITY_COMMANDS = {
+    "autoimmune",
+    "addadminrole",
+    "removeadminrole",
+    "addmodrole",
+    "removemodrole",
+}
+
 EMBED_MODLOG = lambda x: _("A member got a level {} warning.").format(x)
 EMBED_USER = lambda x: _("The moderation team set you a level {} warning.").format(x)
 
@@ -134,7 +147,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
     """
 
     default_global = {
-        "data_version": "0.0"  # will be edited after config update, current version is 1.0
+        "data_version": "0.0"  # will be edited after config update, current version is 2.0
     }
     default_guild = {
         "delete_message": False,  # if the [p]warn commands should delete the context message
@@ -208,7 +221,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             "warnings": [],  # all automatic warns
         },
     }
-    default_custom_member = {"x": []}  # cannot set a list as base group
+    default_custom_member = {"x": []}  # cannot set a list as base group, only kept for conversion
 
     def __init__(self, bot):
         self.bot = bot
@@ -222,12 +235,13 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             pass
         self.data.register_custom("MODLOGS", **self.default_custom_member)
 
-        self.cache = MemoryCache(self.bot, self.data)
-        self.api = API(self.bot, self.data, self.cache)
+        self.store = CaseStore(cog_data_path(self) / "modlogs.db")
+        self.cache = MemoryCache(self.bot, self.data, self.store)
+        self.api = API(self.bot, self.data, self.cache, self.store)
 
         self.task: asyncio.Task
 
-    __version__ = "1.4.1"
+    __version__ = "1.5.0"
     __author__ = ["retke (El Laggron)"]
 
     # helpers
@@ -634,6 +648,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         except commands.BadArgument as e:
             await ctx.send(e)
             return
+        if selection.explain:
+            await ctx.send(selection.explain)
+            return
         await self.call_masswarn(
             ctx,
             1,
@@ -661,6 +678,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         except commands.BadArgument as e:
             await ctx.send(e)
             return
+        if selection.explain:
+            await ctx.send(selection.explain)
+            return
         await self.call_masswarn(
             ctx,
             1,
@@ -691,6 +711,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         except commands.BadArgument as e:
             await ctx.send(e)
             return
+        if selection.explain:
+            await ctx.send(selection.explain)
+            return
         await self.call_masswarn(
             ctx,
             2,
@@ -718,6 +741,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         except commands.BadArgument as e:
             await ctx.send(e)
             return
+        if selection.explain:
+            await ctx.send(selection.explain)
+            return
         await self.call_masswarn(
             ctx,
             3,
@@ -745,6 +771,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         except commands.BadArgument as e:
             await ctx.send(e)
             return
+        if selection.explain:
+            await ctx.send(selection.explain)
+            return
         await self.call_masswarn(
             ctx,
             4,
@@ -775,6 +804,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         except commands.BadArgument as e:
             await ctx.send(e)
             return
+        if selection.explain:
+            await ctx.send(selection.explain)
+            return
         await self.call_masswarn(
             ctx,
             5,
@@ -813,15 +845,16 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         ):
             await ctx.send(_("You are not allowed to see other's warnings!"))
             return
-        cases = await self.api.get_all_cases(ctx.guild, user)
-        if not cases:
+        guild = ctx.guild
+        counts = self.cache.get_case_counts(guild, user)
+        total_cases = sum(counts.values())
+        if not total_cases:
             await ctx.send(_("That member was never warned."))
             return
-        if 0 < index < len(cases):
+        if not 0 <= index <= total_cases:
             await ctx.send(_("That case doesn't exist."))
             return
 
-        total = lambda level: len([x for x in cases if x["level"] == level])
         warning_str = lambda level, plural: {
             1: (_("Warning"), _("Warnings")),
             2: (_("Mute"), _("Mutes")),
@@ -830,15 +863,14 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             5: (_("Ban"), _("Bans")),
         }.get(level, _("unknown"))[1 if plural else 0]
 
-        embeds = []
         msg = []
         for i in range(6):
-            total_warns = total(i)
+            total_warns = counts.get(i, 0)
             if total_warns > 0:
                 msg.append(f"{warning_str(i, total_warns > 1)}: {total_warns}")
         warn_field = "\n".join(msg) if len(msg) > 1 else msg[0]
         warn_list = []
-        for case in cases[:-10:-1]:
+        for case in await self.api.get_all_cases(guild, user, limit=9, newest_first=True):
             level = case["level"]
             reason = str(case["reason"]).splitlines()
             if len(reason) > 1:
@@ -851,32 +883,36 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 break
             else:
                 warn_list.append(text)
-        embed = discord.Embed(description=_("User modlog summary."))
-        embed.set_author(name=f"{user} | {user.id}", icon_url=user.avatar.url)
-        embed.add_field(
-            name=_("Total number of warnings: ") + str(len(cases)), value=warn_field, inline=False
+        summary = discord.Embed(description=_("User modlog summary."))
+        summary.set_author(name=f"{user} | {user.id}", icon_url=user.avatar.url)
+        summary.add_field(
+            name=_("Total number of warnings: ") + str(total_cases), value=warn_field, inline=False
         )
-        embed.add_field(
+        summary.add_field(
             name=_("{len} last warnings").format(len=len(warn_list))
             if len(warn_list) > 1
             else _("Last warning"),
             value="".join(warn_list),
             inline=False,
         )
-        embed.set_footer(text=_("Click on the reactions to scroll through the warnings"))
-        embed.colour = user.top_role.colour
-        embeds.append(embed)
-
-        for i, case in enumerate(cases):
+        summary.set_footer(text=_("Click on the reactions to scroll through the warnings"))
+        summary.colour = user.top_role.colour
+        colors = (await self.cache.get_guild_settings(guild))["colors"]
+
+        def render_case(page: int) -> discord.Embed:
+            # cases are only read and formatted once the user scrolls to them
+            if page == 0:
+                return summary
+            embed = discord.Embed(description=_("Case #{number} informations").format(number=page))
+            embed.set_author(name=f"{user} | {user.id}", icon_url=user.avatar.url)
+            case = self.store.get(guild.id, user.id, page)
+            if case is None:  # removed while the menu is open
+                return embed
             level = case["level"]
-            moderator = ctx.guild.get_member(case["author"])
+            moderator = guild.get_member(case["author"])
             moderator = "ID: " + str(case["author"]) if not moderator else moderator.mention
 
             time = self.api._get_datetime(case["time"])
-            embed = discord.Embed(
-                description=_("Case #{number} informations").format(number=i + 1)
-            )
-            embed.set_author(name=f"{user} | {user.id}", icon_url=user.avatar.url)
             embed.add_field(
                 name=_("Level"), value=f"{warning_str(level, False)} ({level})", inline=True
             )
@@ -892,15 +928,20 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 )
             embed.add_field(name=_("Reason"), value=case["reason"], inline=False),
             embed.timestamp = time
-            embed.colour = await self.data.guild(ctx.guild).colors.get_raw(level)
-            embeds.append(embed)
+            embed.colour = colors.get(str(level))
+            return embed
 
-        controls = {"⬅": menus.prev_page, "❌": menus.close_menu, "➡": menus.next_page}
+        controls = paginator.DEFAULT_CONTROLS.copy()
         if await mod.is_mod_or_superior(self.bot, ctx.author):
             controls.update({"✏": self._edit_case, "🗑": self._delete_case})
 
-        await menus.menu(
-            ctx=ctx, pages=embeds, controls=controls, message=None, page=index, timeout=60
+        await paginator.menu(
+            ctx=ctx,
+            pages=paginator.LazyPages(total_cases + 1, render_case),
+            controls=controls,
+            message=None,
+            page=index,
+            timeout=60,
         )
 
     async def _edit_case(
@@ -971,7 +1012,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         if page == 0:
             # first page, no case to edit
             await message.remove_reaction(emoji, ctx.author)
-            return await menus.menu(
+            return await paginator.menu(
                 ctx, pages, controls, message=message, page=page, timeout=timeout
             )
         await message.clear_reactions()
@@ -991,7 +1032,6 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             "Case #{number} edition.\n\n**Please type the new reason to set**"
         ).format(number=page)
         embed.set_footer(text=_("You have two minutes to type your text in the chat."))
-        case = (await self.data.custom("MODLOGS", guild.id, member.id).x())[page - 1]
         await message.edit(embed=embed)
         try:
             response = await self.bot.wait_for(
@@ -1000,7 +1040,14 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         except AsyncTimeoutError:
             await message.delete()
             return
-        case = (await self.data.custom("MODLOGS", guild.id, member.id).x())[page - 1]
+        try:
+            case = await self.api.get_case(guild, member, page)
+        except errors.NotFound:
+            await message.edit(
+                content=_("This case doesn't exist anymore, it may have been deleted already."),
+                embed=None,
+            )
+            return
         new_reason = await self.api.format_reason(guild, response.content)
         embed.description = _("Case #{number} edition.").format(number=page)
         embed.add_field(name=_("Old reason"), value=case["reason"], inline=False)
@@ -1016,14 +1063,29 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             await message.edit(content=_("Question timed out."), embed=None)
             return
         if pred.result:
-            async with self.data.custom("MODLOGS", guild.id, member.id).x() as logs:
-                logs[page - 1]["reason"] = new_reason
-                try:
-                    channel_id, message_id = logs[page - 1]["modlog_message"].values()
-                except KeyError:
-                    result = None
-                else:
-                    result = await edit_message(channel_id, message_id, new_reason)
+            try:
+                await self.api.edit_case(guild, member, page, new_reason)
+            except errors.BadArgument:
+                await message.clear_reactions()
+                await message.edit(
+                    content=_("The reason must not be above 1024 characters."), embed=None
+                )
+                return
+            except errors.NotFound:
+                await message.clear_reactions()
+                await message.edit(
+                    content=_(
+                        "This case doesn't exist anymore, it may have been deleted already."
+                    ),
+                    embed=None,
+                )
+                return
+            try:
+                channel_id, message_id = case["modlog_message"].values()
+            except KeyError:
+                result = None
+            else:
+                result = await edit_message(channel_id, message_id, new_reason)
             await message.clear_reactions()
             text = _("The reason was successfully edited!\n")
             if result is False:
@@ -1118,7 +1180,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 if member:
                     if mute_role and mute_role in member.roles:
                         can_unmute = True
-                    add_roles = await self.data.guild(guild).remove_roles()
+                    add_roles = (await self.cache.get_guild_settings(guild))["remove_roles"]
             description = _(
                 "Case #{number} deletion.\n**Click on the reaction to confirm your action.**"
             ).format(number=page)
@@ -1144,23 +1206,28 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             return
         if page == 0:
             # removing entire modlog
-            await self.data.custom("MODLOGS", guild.id, member.id).x.set([])
+            await self.api.delete_all_cases(guild, member)
             log.debug(f"[Guild {guild.id}] Cleared modlog of member {member} (ID: {member.id}).")
             await message.clear_reactions()
             await message.edit(content=_("User modlog cleared."), embed=None)
             return
-        async with self.data.custom("MODLOGS", guild.id, member.id).x() as logs:
-            try:
-                roles = logs[page - 1]["roles"]
-            except KeyError:
-                roles = []
-            try:
-                channel_id, message_id = logs[page - 1]["modlog_message"].values()
-            except KeyError:
-                result = None
-            else:
-                result = await delete_message(channel_id, message_id)
-            logs.remove(logs[page - 1])
+        try:
+            case = await self.api.delete_case(guild, member, page)
+        except errors.NotFound:
+            # the cases were renumbered by another deletion in the meantime
+            await message.clear_reactions()
+            await message.edit(
+                content=_("This case doesn't exist anymore, it may have been deleted already."),
+                embed=None,
+            )
+            return
+        roles = case.get("roles", [])
+        try:
+            channel_id, message_id = case["modlog_message"].values()
+        except KeyError:
+            result = None
+        else:
+            result = await delete_message(channel_id, message_id)
         log.debug(
             f"[Guild {guild.id}] Removed case #{page} from member {member} (ID: {member.id})."
         )
@@ -1188,12 +1255,16 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         List the latest warnings issued on the server.
         """
         guild = ctx.guild
-        full_text = ""
-        warns = await self.api.get_all_cases(guild)
-        if not warns:
+        total_warns = await self.api.count_cases(guild)
+        if not total_warns:
             await ctx.send(_("No warnings have been issued in this server yet."))
             return
-        for i, warn in enumerate(warns, start=1):
+        per_page = 5
+        # keep each page below the message limit, whatever the length of the reasons
+        case_length = 1900 // per_page
+        total_pages = -(-total_warns // per_page)
+
+        def format_case(number: int, warn: dict, shorten: bool = True) -> str:
             text = _(
                 "--- Case {number} ---\n"
                 "Member:    {member} (ID: {member.id})\n"
@@ -1201,28 +1272,39 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 "Reason:    {reason}\n"
                 "Author:    {author} (ID: {author.id})\n"
                 "Date:      {time}\n"
-            ).format(number=i, **warn)
+            ).format(number=number, **warn)
             if warn["duration"]:
                 duration = self.api._get_timedelta(warn["duration"])
                 text += _("Duration:  {duration}\nUntil:     {until}\n").format(
                     duration=self.api._format_timedelta(duration),
                     until=self.api._format_datetime(warn["time"] + duration),
                 )
-            text += "\n\n"
-            full_text = text + full_text
-        pages = [
-            x for x in pagify(full_text, delims=["\n\n", "\n"], priority=True, page_length=1900)
-        ]
-        total_pages = len(pages)
-        total_warns = len(warns)
-        pages = [
-            f"```yml\n{x}```\n"
-            + _("{total} warnings. Page {i}/{pages}").format(
-                total=total_warns, i=i, pages=total_pages
+            if shorten and len(text) > case_length:
+                reason = str(warn["reason"])
+                excess = len(text) - case_length + 3
+                warn["reason"] = reason[: max(len(reason) - excess, 0)] + "..."
+                return format_case(number, warn, shorten=False)
+            return text
+
+        def render_page(page: int) -> str:
+            # only the cases of this page are read, from the newest to the oldest
+            offset = page * per_page
+            warns = self.api._iter_guild_cases(
+                guild, limit=per_page, offset=offset, newest_first=True
+            )
+            text = "\n\n".join(
+                format_case(total_warns - offset - i, warn) for i, warn in enumerate(warns)
+            )
+            return f"```yml\n{text}```\n" + _("{total} warnings. Page {i}/{pages}").format(
+                total=total_warns, i=page + 1, pages=total_pages
             )
-            for i, x in enumerate(pages, start=1)
-        ]
-        await menus.menu(ctx=ctx, pages=pages, controls=menus.DEFAULT_CONTROLS, timeout=60)
+
+        await paginator.menu(
+            ctx=ctx,
+            pages=paginator.LazyPages(total_pages, render_page),
+            controls=paginator.DEFAULT_CONTROLS,
+            timeout=60,
+        )
 
     @commands.command()
     @checks.mod_or_permissions(manage_roles=True)
@@ -1354,6 +1436,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
     @listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
         guild = after.guild
+        if before.roles != after.roles:
+            # immune and mod roles may have been added or removed
+            self.api.invalidate_automod_eligibility(guild, after)
         mute_role = guild.get_role(await self.cache.get_mute_role(guild))
         if not mute_role:
             return
@@ -1371,7 +1456,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         guild = channel.guild
         if isinstance(channel, discord.VoiceChannel):
             return
-        if not await self.data.guild(guild).update_mute():
+        if not (await self.cache.get_guild_settings(guild))["update_mute"]:
             return
         role = guild.get_role(await self.cache.get_mute_role(guild))
         if not role:
@@ -1411,7 +1496,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         # https://github.com/Cog-Creators/Red-DiscordBot/blob/bc21f779762ec9f460aecae525fdcd634f6c2d85/redbot/core/modlog.py#L68
         if not guild.me.guild_permissions.view_audit_log:
             return
-        if not await self.data.guild(guild).log_manual():
+        if not (await self.cache.get_guild_settings(guild))["log_manual"]:
             return
         # check for that before doing anything else, means WarnSystem isn't setup
         try:
@@ -1467,6 +1552,14 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                     return
             await asyncio.sleep(300)
 
+    @listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        # the immune and mod roles are edited with core commands, the automod must know it
+        if ctx.guild is None or ctx.command is None:
+            return
+        if IMMUNITY_COMMANDS.intersection(ctx.command.qualified_name.split()):
+            self.api.invalidate_automod_eligibility(ctx.guild)
+
     @listener()
     async def on_command_error(self, ctx, error):
         if not isinstance(error, commands.CommandInvokeError):
@@ -1517,32 +1610,40 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         file = BytesIO()
         file.write(readme.encode("utf-8"))
         files = {"README": file}
-        all_modlogs = await self.data.custom("MODLOGS").all()
-        for guild_id, modlogs in all_modlogs.items():
-            if str(user_id) not in modlogs:
-                files[guild_id] = BytesIO()
-            guild = self.bot.get_guild(int(guild_id))
-            text = "Modlogs registered for server {guild}\n".format(
-                guild=guild.name if guild else f"{guild_id} (not found)"
+        # cases are read one by one through the member index of the store, sorted by guild
+        # only the guilds where the user has cases are touched, each one written in its own file
+        for guild_id, modlogs in groupby(self.store.iter_user(user_id), key=itemgetter(0)):
+            guild = self.bot.get_guild(guild_id)
+            text = TextIOWrapper(BytesIO(), encoding="utf-8")
+            text.write(
+                "Modlogs registered for server {guild}\n".format(
+                    guild=guild.name if guild else f"{guild_id} (not found)"
+                )
             )
-            for i, modlog in enumerate(modlogs[str(user_id)]["x"]):
-                text += (
-                    "\n\n\n--- Case {number} ---\nLevel:     {level}\nReason:    {reason}\n"
-                ).format(number=i + 1, **modlog)
-                text += "Date:      {date}\n".format(
-                    date=self.api._format_datetime(self.api._get_datetime(modlog["time"]))
+            for i, (_guild_id, modlog) in enumerate(modlogs, start=1):
+                text.write(
+                    "\n\n\n--- Case {number} ---\nLevel:     {level}\nReason:    {reason}\n".format(
+                        number=i, level=modlog["level"], reason=modlog["reason"]
+                    )
                 )
-                if modlog["duration"]:
+                text.write(
+                    "Date:      {date}\n".format(
+                        date=self.api._format_datetime(self.api._get_datetime(modlog["time"]))
+                    )
+                )
+                if modlog.get("duration"):
                     duration = self.api._get_timedelta(modlog["duration"])
-                    text += "Duration:  {duration} (raw: {raw}s)\n".format(
-                        duration=self.api._format_timedelta(duration),
-                        raw=modlog["duration"],
+                    text.write(
+                        "Duration:  {duration} (raw: {raw}s)\n".format(
+                            duration=self.api._format_timedelta(duration),
+                            raw=modlog["duration"],
+                        )
                     )
-                if modlog["roles"]:
-                    text += "Roles:     {roles}\n".format(roles=", ".join(modlog["roles"]))
-            file = BytesIO()
-            file.write(text.encode("utf-8"))
-            files[guild_id] = file
+                if modlog.get("roles"):
+                    text.write(
+                        "Roles:     {roles}\n".format(roles=", ".join(map(str, modlog["roles"])))
+                    )
+            files[str(guild_id)] = text.detach()
         return files
 
     async def red_get_data_for_user(self, *, user_id: int):
@@ -1563,12 +1664,8 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         allowed_requesters = ("discord_deleted_user",)
         if requester not in allowed_requesters:
             return False
-        async with self.data.custom("MODLOGS").all() as all_modlogs:
-            for guild_id, modlogs in all_modlogs.items():
-                try:
-                    del all_modlogs[guild_id][str(user_id)]
-                except KeyError:
-                    pass
+        guilds = self.store.clear_user(user_id)
+        self.cache.clear_case_counts(member=user_id, guild_ids=guilds)
         return True
 
     async def red_delete_data_for_user(self, *, requester: str, user_id: int):
@@ -1601,3 +1698,6 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         # stop checking for unmute and unban
         self.task.cancel()
         self.api.disable_automod()
+        self.api.re_pool.terminate()
+        self.api.re_slow_pool.terminate()
+        self.store.close()